@@ -1,29 +1,47 @@
+import io
 import os
 import json
 import logging
 import re
+import hashlib
+import time
+from contextlib import contextmanager
 from datetime import datetime, date
-from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory, flash
-import google.generativeai as genai
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_from_directory, send_file, flash, Response, stream_with_context
 from dotenv import load_dotenv
 import markdown2
 import pdfkit
-from models import db, PersonalInfo, Experience, Education, JobApplication, User
+from models import db, PersonalInfo, Experience, Education, JobApplication, User, GenerationJob, InflightJob, GenerationBatch
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from forms import LoginForm, RegistrationForm
 import click
-from werkzeug.utils import secure_filename
+from werkzeug.utils import safe_join, secure_filename
 from utils.cv_style import cv_styles
 from utils.generic_style import generic_styles
-from PyPDF2 import PdfMerger
+from utils.job_queue import JobQueue
+from utils.response_cache import TieredCache
+from utils.rate_limiter import RateLimiterRegistry
+from utils.provider_health import CircuitBreaker, LatencyWindow, OutcomeWindow
+from utils.job_info_extractor import extract_job_info_locally
+from utils.cv_relevance import select_relevant_cv, compact_json
+from utils.llm_metrics import LLMMetrics, response_usage, call_cost, summarize_calls
+from utils.translation_memory import TranslationMemory
+from utils.mock_llm import MockModel
+from utils.json_parser import ModelJSONError, Schema, parse_model_json
+from utils.prefetch import PrefetchCache
+from utils.cancellation import Cancelled
+from utils.pdf_render import build_renderer, merge_pdfs
+from utils.render_cache import RenderCache
+from utils.lazy_render import LazyRenders
+from utils.llm_backends import (LLMResponse, GeminiBackend, OpenAIBackend, OpenAICompatibleBackend,
+                                MockBackend, LatencyAwareRouter)
 from functools import wraps
-import openai
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, TimeoutError as FutureTimeoutError
 
 # Load environment variables
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-openai.api_key = OPENAI_API_KEY
 OPENAI_MODEL = os.getenv('CHATGPT_MODEL', 'gpt-4o-mini')
 
 
@@ -46,22 +64,203 @@ def require_api_key(f):
         return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
     return decorated_function
 
-# Configure Gemini API
+# LLM_PROVIDER=mock answers every call offline (for load and latency testing, no API keys needed)
+LLM_MOCK = os.getenv('LLM_PROVIDER', '').lower() == 'mock'
+
+def mock_setting(provider, name, default):
+    """Reads MOCK_<PROVIDER>_<NAME>, falling back to MOCK_<NAME>."""
+    return float(os.getenv(f'MOCK_{provider.upper()}_{name}', os.getenv(f'MOCK_{name}', default)))
+
+def mock_model(provider):
+    return MockModel(
+        provider,
+        latency=mock_setting(provider, 'LATENCY', '1.0'),
+        jitter=mock_setting(provider, 'LATENCY_JITTER', '0.5'),
+        error_rate=mock_setting(provider, 'ERROR_RATE', '0'),
+        rate_limit_rate=mock_setting(provider, 'RATE_LIMIT_RATE', '0'),
+        seed=int(mock_setting(provider, 'SEED', '0'))
+    )
+
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
-if not GOOGLE_API_KEY:
-    raise ValueError("GOOGLE_API_KEY environment variable is not set")
-genai.configure(api_key=GOOGLE_API_KEY)
 GEMINI_MODEL = os.getenv('GEMINI_MODEL')
-model = genai.GenerativeModel(GEMINI_MODEL)
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '120'))
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '8'))
+
+def build_backend(name):
+    """Creates the backend for one entry of LLM_BACKENDS.
+
+    'gemini' and 'openai' use their SDKs; any other name is an OpenAI-compatible
+    server configured with <NAME>_BASE_URL, <NAME>_MODEL and optionally <NAME>_API_KEY.
+    """
+    if LLM_MOCK:
+        return MockBackend(name, mock_model(name))
+    if name == 'gemini':
+        if not GOOGLE_API_KEY:
+            raise ValueError("GOOGLE_API_KEY environment variable is not set")
+        return GeminiBackend(name, GOOGLE_API_KEY, GEMINI_MODEL)
+    if name == 'openai':
+        return OpenAIBackend(name, OPENAI_API_KEY, OPENAI_MODEL, timeout=LLM_TIMEOUT, pool_size=LLM_POOL_SIZE)
+    prefix = name.upper()
+    base_url = os.getenv(f'{prefix}_BASE_URL')
+    if not base_url:
+        raise ValueError(f"Unknown LLM backend '{name}': set {prefix}_BASE_URL for an OpenAI-compatible server")
+    return OpenAICompatibleBackend(
+        name, base_url, os.getenv(f'{prefix}_MODEL', 'local-model'), api_key=os.getenv(f'{prefix}_API_KEY'),
+        timeout=LLM_TIMEOUT, pool_size=LLM_POOL_SIZE
+    )
+
+# Backends in fallback order; the router may reorder them by recent latency and errors
+LLM_BACKENDS = [name.strip() for name in os.getenv('LLM_BACKENDS', 'gemini,openai').split(',') if name.strip()]
+llm_backends = {name: build_backend(name) for name in LLM_BACKENDS}
+
+# Pool for running independent LLM calls of a pipeline in parallel
+LLM_MAX_WORKERS = int(os.getenv('LLM_MAX_WORKERS', '4'))
+CONCURRENT_PIPELINE = os.getenv('CONCURRENT_PIPELINE', 'true').lower() in ('1', 'true', 'yes')
+llm_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix='llm')
+# Batch jobs get their own, smaller pool so a large batch cannot take every interactive slot
+BATCH_LLM_MAX_WORKERS = int(os.getenv('BATCH_LLM_MAX_WORKERS', '2'))
+batch_llm_executor = ThreadPoolExecutor(max_workers=BATCH_LLM_MAX_WORKERS, thread_name_prefix='batch-llm')
+
+# Cache of model responses, shared by all gunicorn workers through SQLite
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Client-side rate limits per provider (<PROVIDER>_RPM, _TPM, _MAX_CONCURRENCY); 0 disables a limit
+LLM_RATE_LIMIT_DEFAULTS = {
+    'gemini': {'rpm': 60, 'tpm': 1000000, 'max_concurrency': 8},
+    'openai': {'rpm': 500, 'tpm': 200000, 'max_concurrency': 8}
+}
+
+def rate_limit_config(provider):
+    defaults = LLM_RATE_LIMIT_DEFAULTS.get(provider, {'rpm': 0, 'tpm': 0, 'max_concurrency': 4})
+    return {
+        'rpm': int(os.getenv(f'{provider.upper()}_RPM', defaults['rpm'])),
+        'tpm': int(os.getenv(f'{provider.upper()}_TPM', defaults['tpm'])),
+        'max_concurrency': int(os.getenv(f'{provider.upper()}_MAX_CONCURRENCY', defaults['max_concurrency']))
+    }
+
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '300'))
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv('LLM_EXPECTED_OUTPUT_TOKENS', '1024'))
+rate_limiters = RateLimiterRegistry(rate_limit_config)
+
+# Circuit breakers route around a failing provider; latency windows drive hedging and routing
+LLM_PROVIDERS = list(llm_backends)
+circuit_breakers = {
+    provider: CircuitBreaker(
+        provider,
+        failure_threshold=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5')),
+        recovery_timeout=float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', '30'))
+    ) for provider in LLM_PROVIDERS
+}
+provider_latencies = {provider: LatencyWindow() for provider in LLM_PROVIDERS}
+provider_outcomes = {provider: OutcomeWindow() for provider in LLM_PROVIDERS}
+llm_router = LatencyAwareRouter(
+    LLM_PROVIDERS, provider_latencies, provider_outcomes,
+    policy=os.getenv('LLM_ROUTING', 'latency'),
+    default_latency=float(os.getenv('LLM_ROUTING_DEFAULT_LATENCY', '10'))
+)
+LLM_HEDGE = os.getenv('LLM_HEDGE', 'false').lower() in ('1', 'true', 'yes')
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '90'))
+LLM_HEDGE_DELAY = float(os.getenv('LLM_HEDGE_DELAY', '20'))
+hedge_executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS * 2, thread_name_prefix='hedge')
+
+# USD per million tokens, for the cost figures in metrics and dry-run estimates
+LLM_PRICES = {
+    'gemini': {
+        'input': float(os.getenv('GEMINI_PRICE_INPUT', '0.10')),
+        'output': float(os.getenv('GEMINI_PRICE_OUTPUT', '0.40'))
+    },
+    'openai': {
+        'input': float(os.getenv('OPENAI_PRICE_INPUT', '0.15')),
+        'output': float(os.getenv('OPENAI_PRICE_OUTPUT', '0.60'))
+    }
+}
+llm_metrics = LLMMetrics()
+
+# Skip the job info LLM call when the local extractor is at least this confident
+JOB_INFO_LOCAL_THRESHOLD = float(os.getenv('JOB_INFO_LOCAL_THRESHOLD', '0.7'))
+
+# 'per_step' makes one call per document; 'combined' asks for job info, CV and letter at once
+GENERATION_MODES = ('per_step', 'combined')
+GENERATION_MODE = os.getenv('GENERATION_MODE', 'per_step')
+
+# Only the experiences, bullets and skills most relevant to the job are sent to the model
+CV_PRUNING = os.getenv('CV_PRUNING', 'true').lower() in ('1', 'true', 'yes')
+CV_MAX_EXPERIENCES = int(os.getenv('CV_MAX_EXPERIENCES', '4'))
+CV_MAX_BULLETS = int(os.getenv('CV_MAX_BULLETS', '4'))
+CV_MAX_SKILLS = int(os.getenv('CV_MAX_SKILLS', '15'))
+
+# Ask the model to fix its JSON once when local repair and schema checks fail
+JSON_FIX_ENABLED = os.getenv('JSON_FIX_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Job info extraction and CV ranking started from the form before the user submits
+PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+PREFETCH_MIN_CHARS = int(os.getenv('PREFETCH_MIN_CHARS', '200'))
+prefetch_cache = PrefetchCache(
+    ThreadPoolExecutor(max_workers=int(os.getenv('PREFETCH_WORKERS', '2')), thread_name_prefix='prefetch'),
+    max_items=int(os.getenv('PREFETCH_MAX_ITEMS', '32')),
+    ttl_seconds=int(os.getenv('PREFETCH_TTL', '900'))
+)
 
 # Configure PDFKit
 WKHTMLTOPDF_PATH = os.getenv('WKHTMLTOPDF_PATH', r'C:\\Program Files\\wkhtmltopdf\\bin\\wkhtmltopdf.exe')
 PDFKIT_CONFIG = pdfkit.configuration(wkhtmltopdf=WKHTMLTOPDF_PATH)
+# Render options of the application documents
+PDF_OPTIONS = {
+    'page-size': 'Letter',
+    'margin-top': '0.75in',
+    'margin-right': '0.75in',
+    'margin-bottom': '0.75in',
+    'margin-left': '0.75in',
+    'encoding': 'UTF-8',
+    'no-outline': None,
+    'enable-local-file-access': None
+}
 # Setup logging
 logging.basicConfig(level=logging.INFO)
+if LLM_MOCK:
+    logging.warning("LLM_PROVIDER=mock: all LLM calls are answered by the offline mock provider")
+
+# 'wkhtmltopdf' starts a process per document; 'chromium' keeps a pool of warm headless browsers
+PDF_RENDER_ENGINE = os.getenv('PDF_RENDER_ENGINE', 'wkhtmltopdf').lower()
+pdf_renderer = build_renderer(
+    PDF_RENDER_ENGINE, PDFKIT_CONFIG,
+    pool_size=int(os.getenv('PDF_RENDER_POOL_SIZE', '2')),
+    queue_depth=int(os.getenv('PDF_RENDER_QUEUE_DEPTH', '16')),
+    timeout=float(os.getenv('PDF_RENDER_TIMEOUT', '60'))
+)
+# Combined documents rendered in one pass, as name=document+document (in page order)
+PDF_DOCUMENTS = ('cv', 'cover_letter_en', 'cover_letter_zh')
+
+def parse_bundles(value):
+    bundles = {}
+    for entry in filter(None, (item.strip() for item in value.split(','))):
+        name, _, documents = entry.partition('=')
+        documents = [document.strip() for document in documents.split('+') if document.strip()]
+        if not documents or any(document not in PDF_DOCUMENTS for document in documents):
+            logging.warning(f"Ignoring PDF bundle {entry!r}: documents must be among {PDF_DOCUMENTS}")
+            continue
+        bundles[name.strip()] = documents
+    return bundles
+
+PDF_BUNDLES = parse_bundles(os.getenv('PDF_BUNDLES', 'merged_application=cover_letter_en+cv'))
+
+def bundle_key(name):
+    """Progress stage and ``files`` key of a bundle; the letter + CV bundle keeps its old key."""
+    return 'merged_pdf' if name == 'merged_application' else f'{name}_pdf'
+
+# Renders in flight per process, shared by every pipeline so batches cannot oversubscribe the cores.
+# By default one slot per document and bundle, so an application's renders run in a single wave
+PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', str(min(len(PDF_DOCUMENTS) + len(PDF_BUNDLES),
+                                                                 os.cpu_count() or 1))))
+render_executor = ThreadPoolExecutor(max_workers=PDF_RENDER_WORKERS, thread_name_prefix='render')
+
+# Lazy mode stores each PDF's HTML and renders it on its first /output/ download instead
+PDF_LAZY_RENDER = os.getenv('PDF_LAZY_RENDER', 'false').lower() in ('1', 'true', 'yes')
+lazy_renders = LazyRenders()
 
 # Use instance_relative_config to let Flask know the instance folder exists
-app = Flask(__name__, instance_relative_config=True)
+# INSTANCE_PATH moves the database, caches and outputs elsewhere (benchmarks use a scratch folder)
+app = Flask(__name__, instance_path=os.getenv('INSTANCE_PATH') or None, instance_relative_config=True)
 
 # Ensure the instance folder exists
 os.makedirs(app.instance_path, exist_ok=True)
@@ -70,6 +269,31 @@ app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(app.instance
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a-secret-key-you-should-change')
 
+llm_cache = TieredCache(
+    os.path.join(app.instance_path, 'llm_cache.db'),
+    namespace='llm',
+    max_memory_items=int(os.getenv('LLM_CACHE_MEMORY_ITEMS', '256')),
+    max_items=int(os.getenv('LLM_CACHE_MAX_ITEMS', '5000')),
+    ttl_seconds=int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+)
+
+# Paragraph-level translations of the cover letters, reused across applications
+TRANSLATION_MEMORY_ENABLED = os.getenv('TRANSLATION_MEMORY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+translation_memory = TranslationMemory(TieredCache(
+    os.path.join(app.instance_path, 'llm_cache.db'),
+    namespace='translation_zh_hant',
+    max_memory_items=int(os.getenv('LLM_CACHE_MEMORY_ITEMS', '256')),
+    max_items=int(os.getenv('TRANSLATION_MEMORY_MAX_ITEMS', '20000')),
+    ttl_seconds=int(os.getenv('TRANSLATION_MEMORY_TTL', str(180 * 24 * 3600)))
+), 'zh-Hant')
+
+# Rendered PDFs keyed by a hash of the final HTML and options; identical renders skip the renderer
+PDF_RENDER_CACHE_ENABLED = os.getenv('PDF_RENDER_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+render_cache = RenderCache(
+    os.path.join(app.instance_path, 'render_cache'),
+    max_bytes=int(float(os.getenv('PDF_RENDER_CACHE_MAX_MB', '200')) * 1024 * 1024)
+) if PDF_RENDER_CACHE_ENABLED else None
+
 def json_serial(obj):
     """JSON serializer for objects not serializable by default json code"""
     if isinstance(obj, (datetime, date)):
@@ -237,17 +461,11 @@ def convert():
                     # If no head tag, just wrap it. Might not be perfect but better than nothing.
                     final_html = f"<html><head><style>{generic_styles}</style></head>{content}</html>"
 
-
-            output_dir = os.path.join(app.root_path, 'output')
-            os.makedirs(output_dir, exist_ok=True)
-            
+            # The renderer hands back the PDF bytes, so they are sent from memory without touching disk
+            pdf = render_pdf(final_html, {})
             timestamp = int(datetime.now().timestamp())
             filename = f"converted_{current_user.id}_{timestamp}.pdf"
-            filepath = os.path.join(output_dir, filename)
-
-            pdfkit.from_string(final_html, filepath, configuration=PDFKIT_CONFIG)
-
-            return send_from_directory(output_dir, filename, as_attachment=True)
+            return send_file(io.BytesIO(pdf), mimetype='application/pdf', as_attachment=True, download_name=filename)
 
         except Exception as e:
             logging.error(f"PDF conversion failed: {e}")
@@ -385,30 +603,138 @@ def save_cv():
 @app.route('/job_application')
 @login_required
 def job_application():
-    return render_template('job_application.html')
-
-def clean_and_parse_json(response_text):
-    """Cleans the Gemini response to extract a valid JSON object."""
-    # Find the JSON block, even with potential markdown wrappers
-    match = re.search(r'```(json)?(.*)```', response_text, re.DOTALL)
-    if match:
-        # Group 2 will capture the content, whether 'json' is present or not
-        json_str = match.group(2).strip()
-    else:
-        # Fallback for when there's no wrapper
-        start = response_text.find('{')
-        end = response_text.rfind('}')
-        if start != -1 and end != -1 and end > start:
-            json_str = response_text[start:end+1]
-        else:
-            raise ValueError("No valid JSON object found in the response.")
-            
+    return render_template('job_application.html', use_events=JOB_EVENTS_ENABLED,
+                           prefetch_min_chars=PREFETCH_MIN_CHARS if PREFETCH_ENABLED else None)
+
+def load_cv_data():
+    """Loads the stored CV as a dictionary, or None if no personal info exists."""
+    personal_info = PersonalInfo.query.first()
+    if not personal_info:
+        return None
+    experiences = Experience.query.all()
+    education = Education.query.all()
+
+    return {
+        'personal_info': {
+            'full_name': personal_info.full_name,
+            'preferred_name': personal_info.preferred_name,
+            'title': personal_info.title,
+            'phone': personal_info.phone,
+            'email': personal_info.email,
+            'location': personal_info.location,
+            'willing_to_relocate': personal_info.willing_to_relocate,
+            'portfolio': personal_info.portfolio,
+            'behance_portfolio': personal_info.behance_portfolio,
+            'github': personal_info.github,
+            'linkedin': personal_info.linkedin,
+            'languages': personal_info.languages,
+            'summary': personal_info.summary,
+            'design_philosophy': personal_info.design_philosophy,
+            'skills': personal_info.skills,
+            'professional_attributes': personal_info.professional_attributes,
+            'references': personal_info.references
+        },
+        'experience': [{
+            'title': exp.title,
+            'company': exp.company,
+            'location': exp.location,
+            'period_start': exp.period_start,
+            'period_end': exp.period_end,
+            'responsibilities': exp.responsibilities,
+            'highlights': exp.highlights
+        } for exp in experiences],
+        'education': [{
+            'degree': edu.degree,
+            'specialization': edu.specialization,
+            'institution': edu.institution,
+            'location': edu.location,
+            'period': edu.period,
+            'highlights': edu.highlights
+        } for edu in education]
+    }
+
+def cv_version(cv_data):
+    """Hashes the CV contents so results can be tied to the CV they were generated from."""
+    raw = json.dumps(cv_data, sort_keys=True, default=json_serial)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def application_request_key(job_description, job_source, options):
+    """Identifies a submission by normalized job description, CV version and options.
+
+    Returns None when no CV is stored yet.
+    """
+    cv_data = load_cv_data()
+    if cv_data is None:
+        return None
+    raw = json.dumps([normalize_job_description(job_description), job_source, cv_version(cv_data), options],
+                     sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def normalize_job_description(job_description):
+    """Collapses whitespace so re-pasted copies of a posting compare equal."""
+    return ' '.join(job_description.split())
+
+def prefetch_key(job_description, cv_data):
+    """Identifies prefetched work by normalized job description and CV version."""
+    raw = json.dumps([normalize_job_description(job_description), cv_version(cv_data)])
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def prefetch_application(job_description):
+    """Starts job info extraction and CV ranking for a job description not submitted yet.
+
+    Returns ``(key, started)``, or None when no CV is stored. The job info call goes
+    through the LLM cache, so a submission handled by another worker still reuses it.
+    The ``job_info`` task returns the extraction and the usage records of its LLM calls.
+    """
+    cv_data = load_cv_data()
+    if cv_data is None:
+        return None
+    key = prefetch_key(job_description, cv_data)
+    known_titles = PersonalInfo.query.first().possible_titles
+
+    def job_info_task():
+        usage = []
+        return extract_job_info(job_description, {'use_cache': True, 'hedge': False, 'usage': usage},
+                                known_titles), usage
+
+    started = prefetch_cache.start(
+        key,
+        cv=lambda: prompt_cv_data(cv_data, job_description),
+        job_info=job_info_task
+    )
+    return key, started
+
+def prefetched_result(future, cancel_token=None):
+    """Waits for prefetched work in short slices so a cancelled job stops waiting."""
+    while True:
+        if cancel_token is not None:
+            cancel_token.check()
+        try:
+            return future.result(timeout=0.2)
+        except FutureTimeoutError:
+            continue
+
+def parse_llm_json(response_text, schema=None, step='other', llm_options=None):
+    """Parses the JSON object in a model response and checks it against ``schema``.
+
+    Fences, surrounding prose, trailing commas and truncated output are repaired locally;
+    only when that fails is the model asked once, with a short prompt, to fix its JSON.
+    """
+    from prompts.fix_json_prompt import get_fix_json_prompt
+    timings = (llm_options or {}).get('timings')
     try:
-        return json.loads(json_str)
-    except json.JSONDecodeError as e:
-        logging.error(f"Failed to decode JSON: {e}")
-        logging.error(f"Problematic JSON string: \\n{json_str}")
-        raise ValueError("Invalid JSON received from the model.")
+        with timed(timings, f'json_parse:{step}'):
+            return parse_model_json(response_text, schema)
+    except ModelJSONError as e:
+        if not JSON_FIX_ENABLED:
+            raise
+        logging.warning(f"Unusable JSON from the model ({step}), asking for a fix: {e}")
+        # The whole response, not the fragment that failed: the usable JSON may be elsewhere in it
+        fix_prompt = get_fix_json_prompt(response_text, e,
+                                         schema.example() if schema is not None else 'Any JSON object')
+    fix_response = unified_generate_content(fix_prompt, step=f'{step}_fix', schema=schema, **(llm_options or {}))
+    with timed(timings, f'json_parse:{step}_fix'):
+        return parse_model_json(fix_response.text, schema)
 
 def json_to_cv_markdown(data):
     """Converts a CV JSON object to a robust Markdown string."""
@@ -479,55 +805,30 @@ def json_to_cv_markdown(data):
 
     return "\\n\\n".join(parts)
 
-def cleanup_output_folder(folder_path, max_files_per_type=10):
+OUTPUT_FILE_TYPES = {'CV_': 'CV', 'CL_': 'CL', 'converted_': 'converted PDF'}
+
+def cleanup_output_folder(folder_path, max_files_per_type=10, prefixes=OUTPUT_FILE_TYPES):
     """Deletes the oldest PDFs in the output folder if the count exceeds the limit."""
     try:
         files = os.listdir(folder_path)
-        
-        # Separate files by type (CV or CL)
-        cv_files = [f for f in files if f.startswith('CV_') and f.endswith('.pdf')]
-        cl_files = [f for f in files if f.startswith('CL_') and f.endswith('.pdf')]
-        
-        # Clean up CV files
-        if len(cv_files) > max_files_per_type:
-            # Sort by creation time (oldest first)
-            cv_files.sort(key=lambda f: os.path.getctime(os.path.join(folder_path, f)))
-            # Calculate how many to delete
-            num_to_delete = len(cv_files) - max_files_per_type
-            # Delete the oldest files
-            for i in range(num_to_delete):
-                os.remove(os.path.join(folder_path, cv_files[i]))
-                print(f"Deleted old CV: {cv_files[i]}")
-
-        # Clean up CL files
-        if len(cl_files) > max_files_per_type:
-            cl_files.sort(key=lambda f: os.path.getctime(os.path.join(folder_path, f)))
-            num_to_delete = len(cl_files) - max_files_per_type
-            for i in range(num_to_delete):
-                os.remove(os.path.join(folder_path, cl_files[i]))
-                print(f"Deleted old CL: {cl_files[i]}")
+
+        # Separate files by type (CV, CL or converted document)
+        for prefix in prefixes:
+            typed_files = [f for f in files if f.startswith(prefix) and f.endswith('.pdf')]
+            if len(typed_files) > max_files_per_type:
+                # Sort by creation time (oldest first) and delete the oldest files
+                typed_files.sort(key=lambda f: os.path.getctime(os.path.join(folder_path, f)))
+                num_to_delete = len(typed_files) - max_files_per_type
+                for i in range(num_to_delete):
+                    os.remove(os.path.join(folder_path, typed_files[i]))
+                    print(f"Deleted old {OUTPUT_FILE_TYPES[prefix]}: {typed_files[i]}")
 
     except OSError as e:
         print(f"Error during cleanup: {e}")
 
-def merge_cl_cv_pdf(cl_path, cv_path, output_path):
-    """Merges cover letter and CV into a single PDF file with cover letter as the first page."""
-    try:
-        merger = PdfMerger()
-        
-        # Add cover letter as first page
-        merger.append(cl_path)
-        # Add CV as subsequent pages
-        merger.append(cv_path)
-        
-        # Write to output file
-        with open(output_path, 'wb') as output_file:
-            merger.write(output_file)
-            
-        return True
-    except Exception as e:
-        logging.error(f"Error merging PDFs: {e}")
-        return False
+# /convert used to leave every converted PDF here; it now streams them, so reclaim the leftovers
+if os.path.isdir(os.path.join(app.root_path, 'output')):
+    cleanup_output_folder(os.path.join(app.root_path, 'output'), max_files_per_type=0, prefixes=('converted_',))
 
 def json_to_cl_markdown(data):
     """Converts a Cover Letter JSON object to a robust Markdown string."""
@@ -540,139 +841,506 @@ def json_to_cl_markdown(data):
     ]
     return "\\n\\n".join(filter(None, parts))
 
-def unified_generate_content(prompt, model_type='gemini', **kwargs):
+def llm_cache_key(provider, model_name, prompt, params):
+    """Builds a content-addressed cache key from the provider, model, prompt and parameters."""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    raw = json.dumps([provider, model_name, prompt_hash, params], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def usable_json(text, schema):
+    """Checks whether a model response parses as JSON matching ``schema``."""
+    try:
+        parse_model_json(text, schema)
+        return True
+    except ModelJSONError:
+        return False
+
+def unified_generate_content(prompt, model_type=None, use_cache=True, hedge=False, step='other',
+                             usage=None, timings=None, cancel_token=None, schema=None, **kwargs):
     """
-    Try Gemini first, fallback to OpenAI on 429/500 errors.
+    Return a cached response for an identical request, otherwise call the model.
+    ``model_type`` names a backend to try first; by default ``llm_router`` picks the order.
+    Pass ``use_cache=False`` to skip the cache lookup; the fresh response still replaces the cached one.
+    Pass ``hedge=True`` to race the fallback provider when the first one is slow.
+    Every call is recorded in ``llm_metrics`` under ``step``, and appended to the ``usage`` list if given.
+    No call is started once ``cancel_token`` is cancelled; ``Cancelled`` is raised instead.
+    JSON calls pass their ``schema``: only a response that parses and matches it is cached,
+    so a truncated answer is not replayed to every retry.
     """
+    if cancel_token is not None:
+        cancel_token.check()
+    started = time.monotonic()
+    call_info = {'attempts': 0}
+    record = {
+        'step': step, 'provider': None, 'model': None, 'prompt_tokens': 0, 'completion_tokens': 0,
+        'latency_s': 0.0, 'retries': 0, 'fallback': False, 'cached': False, 'cost_usd': 0.0, 'error': None
+    }
     try:
-        if model_type == 'gemini':
-            response = model.generate_content(prompt, **kwargs)
-            return response
+        # Every configured backend and its model is part of the key, so changing a model starts fresh
+        backend_models = ','.join(f'{name}:{llm_backends[name].model_name}' for name in LLM_PROVIDERS)
+        cache_key = llm_cache_key(model_type or 'auto', backend_models, prompt, kwargs)
+        if use_cache and LLM_CACHE_ENABLED:
+            cached_text = llm_cache.get(cache_key)
+            if cached_text is not None and (schema is None or usable_json(cached_text, schema)):
+                record['cached'] = True
+                return LLMResponse(cached_text)
+
+        response = generate_content_uncached(prompt, model_type, hedge=hedge, call_info=call_info,
+                                             cancel_token=cancel_token, **kwargs)
+        if LLM_CACHE_ENABLED and response is not None:
+            if schema is None or usable_json(response.text, schema):
+                llm_cache.set(cache_key, response.text)
+            else:
+                llm_cache.delete(cache_key)
+
+        provider = call_info.get('provider', call_info.get('primary'))
+        prompt_tokens, completion_tokens = response_usage(response) or (
+            estimate_tokens(prompt), estimate_tokens(response.text or ''))
+        record.update(
+            provider=provider,
+            model=call_info.get('model'),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            fallback=provider != call_info.get('primary'),
+            cost_usd=call_cost(LLM_PRICES, provider, prompt_tokens, completion_tokens)
+        )
+        return response
     except Exception as e:
-        # Gemini API error handling
-        if hasattr(e, 'status_code') and e.status_code in [429, 500]:
-            logging.warning(f"Gemini error {e.status_code}, fallback to OpenAI.")
-        elif '429' in str(e) or '500' in str(e):
-            logging.warning(f"Gemini error: {e}, fallback to OpenAI.")
-        else:
-            raise  # Other errors不處理
-        # fallback to OpenAI
+        record['error'] = str(e)
+        raise
+    finally:
+        record['latency_s'] = round(time.monotonic() - started, 3)
+        record['retries'] = max(0, call_info['attempts'] - 1)
+        llm_metrics.record(record)
+        if usage is not None:
+            usage.append(record)
+        if timings is not None:
+            timings.append((f'llm:{step}', record['latency_s']))
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+def should_fallback(error):
+    """Checks whether an error means the provider is unhealthy and another one should be tried."""
+    if isinstance(error, TimeoutError):
+        return True
+    if hasattr(error, 'status_code') and error.status_code in [429, 500, 503]:
+        return True
+    return '429' in str(error) or '500' in str(error) or '503' in str(error)
+
+def call_provider(provider, prompt, estimated_tokens, call_info=None, **kwargs):
+    """Calls one backend within its rate limits and records the outcome for routing.
+
+    ``call_info`` counts the attempts and remembers the provider that answered first.
+    """
+    if call_info is not None:
+        call_info['attempts'] = call_info.get('attempts', 0) + 1
+    backend = llm_backends[provider]
+    # A timeout waiting for a local rate limiter slot says nothing about the provider's health
+    with rate_limiters.get(provider, backend.model_name).acquire(estimated_tokens, LLM_QUEUE_TIMEOUT):
+        started = time.monotonic()
         try:
-            completion = openai.ChatCompletion.create(
-                model=OPENAI_MODEL,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=kwargs.get('temperature', 0.7),
-                max_tokens=kwargs.get('max_tokens', 2048)
-            )
-            class DummyResponse:
-                def __init__(self, text):
-                    self.text = text
-            return DummyResponse(completion.choices[0].message.content)
-        except Exception as oe:
-            logging.error(f"OpenAI fallback also failed: {oe}")
+            response = backend.generate(prompt, **kwargs)
+        except Exception as e:
+            if should_fallback(e):
+                circuit_breakers[provider].record_failure()
+                provider_outcomes[provider].add(False)
             raise
-
-def process_job_application(job_description, job_source='indeed'):
-    """Process job application and generate all necessary documents."""
+    circuit_breakers[provider].record_success()
+    provider_latencies[provider].add(time.monotonic() - started)
+    provider_outcomes[provider].add(True)
+    if call_info is not None and 'provider' not in call_info:
+        call_info.update(provider=provider, model=backend.model_name)
+    return response
+
+def next_provider(order, exclude=()):
+    """Returns the first provider in ``order`` whose circuit lets a call through."""
+    for provider in order:
+        if provider not in exclude and circuit_breakers[provider].allow():
+            return provider
+    return None
+
+def generate_content_uncached(prompt, model_type=None, hedge=False, call_info=None, cancel_token=None, **kwargs):
+    """
+    Try the backends in the order chosen by ``llm_router`` (``model_type`` first if given),
+    moving on to the next one on 429/500/503 errors and timeouts.
+    Providers with an open circuit are skipped, and calls wait for a slot in the
+    provider's rate limiter instead of failing.
+    """
+    estimated_tokens = estimate_tokens(prompt) + LLM_EXPECTED_OUTPUT_TOKENS
+    order = llm_router.order(model_type)
+    # When every circuit is open, still try the best provider
+    primary = next_provider(order) or order[0]
+    if call_info is not None:
+        call_info['primary'] = primary
+
+    if hedge:
+        return generate_content_hedged(primary, order, prompt, estimated_tokens, call_info, cancel_token, **kwargs)
+
+    provider, tried = primary, []
+    while True:
+        if cancel_token is not None:
+            cancel_token.check()
+        try:
+            return call_provider(provider, prompt, estimated_tokens, call_info, **kwargs)
+        except Exception as e:
+            tried.append(provider)
+            fallback = next_provider(order, exclude=tried)
+            if fallback is None or not should_fallback(e):
+                if len(tried) > 1:
+                    logging.error(f"{provider} fallback also failed: {e}")
+                raise  # Other errors不處理
+            logging.warning(f"{provider} error: {e}, fallback to {fallback}.")
+            provider = fallback
+
+def generate_content_hedged(primary, order, prompt, estimated_tokens, call_info=None, cancel_token=None, **kwargs):
+    """
+    Send the prompt to ``primary``; if it has not answered within its usual latency
+    percentile, send it to the fallback provider as well and use whichever answers first.
+    The hedge is not started once ``cancel_token`` is cancelled.
+    """
+    if cancel_token is not None:
+        cancel_token.check()
+    delay = provider_latencies[primary].percentile(LLM_HEDGE_PERCENTILE) or LLM_HEDGE_DELAY
+    first = hedge_executor.submit(call_provider, primary, prompt, estimated_tokens, call_info, **kwargs)
+    done, _ = wait([first], timeout=delay)
+    if done and first.exception() is None:
+        return first.result()
+
+    fallback = next_provider(order, exclude=[primary])
+    if fallback is None or (done and not should_fallback(first.exception())):
+        return first.result()
+    if cancel_token is not None:
+        cancel_token.check()
+    logging.info(f"Hedging {primary} call with {fallback} after {delay:.1f}s")
+    pending = {first, hedge_executor.submit(call_provider, fallback, prompt, estimated_tokens, call_info, **kwargs)}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+JOB_INFO_SCHEMA = Schema({'job_title?': str, 'company_name?': str})
+
+def get_job_info_prompt(job_description):
+    return f"""
+        Analyze the following job description and extract the job title and the company name.
+        Return the information in a JSON object with the keys "job_title" and "company_name".
+        If a value is not found, return "N/A".
+
+        Job Description:
+        ---
+        {job_description}
+        ---
+        """
+
+def extract_job_info(job_description, llm_options=None, known_titles=None):
+    """Extracts the job title and company name.
+
+    Common posting layouts are parsed locally; the model is only asked when the local
+    guess is not confident enough. Falls back to the local guess, then to placeholders.
+    """
+    local_title, local_company, confidence = extract_job_info_locally(job_description, known_titles)
+    if confidence >= JOB_INFO_LOCAL_THRESHOLD:
+        logging.info(f"Job info extracted locally (confidence {confidence:.2f})")
+        return local_title, local_company
     try:
-        # --- Step 1: Extract Job Title and Company from Job Description ---
+        job_info_response = unified_generate_content(get_job_info_prompt(job_description), step='job_info',
+                                                     schema=JOB_INFO_SCHEMA, **(llm_options or {}))
+        job_info = parse_llm_json(job_info_response.text, JOB_INFO_SCHEMA, 'job_info', llm_options)
+        return job_info.get('job_title', 'Job'), job_info.get('company_name', 'Company')
+    except Cancelled:
+        raise
+    except Exception as e:
+        logging.error(f"Error extracting job info: {e}")
+        return local_title or "Job", local_company or "Company"
+
+def generate_cv_markdown(job_details, cv_data, llm_options=None):
+    """Generates the tailored CV and returns it as Markdown."""
+    from prompts.cv_prompt import get_cv_prompt, CV_SCHEMA
+    cv_prompt = get_cv_prompt(job_details, cv_data)
+    cv_response = unified_generate_content(cv_prompt, step='cv', schema=CV_SCHEMA, **(llm_options or {}))
+    cv_json = parse_llm_json(cv_response.text, CV_SCHEMA, 'cv', llm_options)
+    with timed((llm_options or {}).get('timings'), 'markdown_build:cv'):
+        cv_md = json_to_cv_markdown(cv_json)
+    return cv_md.replace("\\n", "\n")
+
+def generate_cover_letter_markdown(job_details, cv_data, llm_options=None):
+    """Generates the English cover letter and returns it as Markdown."""
+    from prompts.cl_prompt import get_cl_prompt, COVER_LETTER_SCHEMA
+    cl_prompt = get_cl_prompt(job_details, cv_data)
+    cl_response = unified_generate_content(cl_prompt, step='cover_letter_en', schema=COVER_LETTER_SCHEMA,
+                                           **(llm_options or {}))
+    cl_json = parse_llm_json(cl_response.text, COVER_LETTER_SCHEMA, 'cover_letter_en', llm_options)
+    with timed((llm_options or {}).get('timings'), 'markdown_build:cover_letter_en'):
+        cover_letter_md = json_to_cl_markdown(cl_json)
+    return cover_letter_md.replace("\\n", "\n")
+
+def translate_paragraphs(paragraphs, llm_options=None):
+    """Translates a list of Markdown paragraphs into Traditional Chinese in one call."""
+    from prompts.cn_prompt import get_cn_paragraphs_prompt, TRANSLATIONS_SCHEMA
+    cn_prompt = get_cn_paragraphs_prompt(paragraphs)
+    cn_response = unified_generate_content(cn_prompt, step='cover_letter_zh', schema=TRANSLATIONS_SCHEMA,
+                                           **(llm_options or {}))
+    translations = parse_llm_json(cn_response.text, TRANSLATIONS_SCHEMA, 'cover_letter_zh', llm_options)['translations']
+    return [str(translation).replace("\\n", "\n") for translation in translations]
+
+def translate_cover_letter(cover_letter_md, llm_options=None):
+    """Translates the English cover letter Markdown into Traditional Chinese.
+
+    Paragraphs translated before are taken from the translation memory; only new or
+    changed paragraphs are sent to the model. Falls back to translating the whole letter.
+    """
+    from prompts.cn_prompt import get_cn_prompt
+    if TRANSLATION_MEMORY_ENABLED:
         try:
-            job_info_prompt = f"""
-            Analyze the following job description and extract the job title and the company name.
-            Return the information in a JSON object with the keys "job_title" and "company_name".
-            If a value is not found, return "N/A".
-
-            Job Description:
-            ---
-            {job_description}
-            ---
-            """
-            job_info_response = unified_generate_content(job_info_prompt)
-            json_text = re.sub(r'```json\s*|\s*```', '', job_info_response.text.strip())
-            job_info = json.loads(json_text)
-            job_title = job_info.get('job_title', 'Job')
-            company_name = job_info.get('company_name', 'Company')
+            return translation_memory.translate(
+                cover_letter_md,
+                lambda paragraphs: translate_paragraphs(paragraphs, llm_options),
+                use_memory=(llm_options or {}).get('use_cache', True)
+            )
+        except Cancelled:
+            raise
         except Exception as e:
-            logging.error(f"Error extracting job info: {e}")
-            job_title = "Job"
-            company_name = "Company"
+            logging.warning(f"Paragraph translation failed, translating the whole letter: {e}")
+    cn_prompt = get_cn_prompt(cover_letter_md)
+    cn_response = unified_generate_content(cn_prompt, step='cover_letter_zh', **(llm_options or {}))
+    chinese_cover_letter_md = cn_response.text.strip()
+    return chinese_cover_letter_md.replace("\\n", "\n")
 
-        # --- Sanitize job title for filename ---
-        def sanitize_filename(name):
-            name = re.sub(r'[\\/*?:"<>|]', "", name)
-            name = name.replace(' ', '_')
-            return name
+def generate_combined_markdown(job_details, cv_data, llm_options=None):
+    """Generates the job info, the CV and the English cover letter in one structured call.
 
-        safe_job_title = sanitize_filename(job_title)
-        personal_info = PersonalInfo.query.first()
-        experiences = Experience.query.all()
-        education = Education.query.all()
+    Returns ``(job_title, company_name, cv_md, cover_letter_md)``.
+    """
+    from prompts.combined_prompt import get_combined_prompt, COMBINED_SCHEMA
+    combined_prompt = get_combined_prompt(job_details, cv_data)
+    combined_response = unified_generate_content(combined_prompt, step='combined', schema=COMBINED_SCHEMA,
+                                                 **(llm_options or {}))
+    combined_json = parse_llm_json(combined_response.text, COMBINED_SCHEMA, 'combined', llm_options)
+    job_info = combined_json.get('job_info') or {}
+    with timed((llm_options or {}).get('timings'), 'markdown_build:combined'):
+        cv_md = json_to_cv_markdown(combined_json.get('cv') or {})
+        cover_letter_md = json_to_cl_markdown(combined_json.get('cover_letter') or {})
+    return (
+        job_info.get('job_title', 'Job'),
+        job_info.get('company_name', 'Company'),
+        cv_md.replace("\\n", "\n"),
+        cover_letter_md.replace("\\n", "\n")
+    )
+
+def prompt_cv_data(cv_data, job_description):
+    """Trims the CV to the parts relevant to the job, reporting the prompt context size.
+
+    Returns ``(cv_data, context_tokens)`` where ``context_tokens`` compares the CV as it
+    used to be sent (indented JSON) with what is sent now.
+    """
+    selected = cv_data
+    if CV_PRUNING:
+        selected = select_relevant_cv(cv_data, job_description, CV_MAX_EXPERIENCES, CV_MAX_BULLETS, CV_MAX_SKILLS)
+    context_tokens = {
+        'before': estimate_tokens(json.dumps(cv_data, indent=2, ensure_ascii=False, default=json_serial)),
+        'after': estimate_tokens(compact_json(selected))
+    }
+    logging.info(f"CV prompt context: {context_tokens['before']} -> {context_tokens['after']} tokens")
+    return selected, context_tokens
+
+@contextmanager
+def timed(timings, stage):
+    """Appends ``(stage, seconds)`` to the ``timings`` list if one is given."""
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((stage, time.perf_counter() - started))
 
-        if not personal_info:
+def run_stage(progress, stage, func, *args, payload=None):
+    """Runs one pipeline stage, reporting its start and outcome to ``progress`` if given.
+
+    ``payload(result)`` returns extra fields sent along with the 'done' status.
+    """
+    if progress:
+        progress(stage, 'running')
+    try:
+        result = func(*args)
+    except Exception as e:
+        if progress:
+            progress(stage, 'error', message=str(e))
+        raise
+    if progress:
+        progress(stage, 'done', **(payload(result) if payload else {}))
+    return result
+
+def markdown_payload(markdown):
+    return {'markdown': markdown}
+
+def job_info_payload(job_info):
+    return {'job_title': job_info[0], 'company_name': job_info[1]}
+
+def generate_cover_letters(job_details, cv_data, progress=None, llm_options=None):
+    """Generates the English letter and translates it as soon as it is ready."""
+    cover_letter_md = run_stage(progress, 'cover_letter_en', generate_cover_letter_markdown,
+                                job_details, cv_data, llm_options, payload=markdown_payload)
+    chinese_cover_letter_md = run_stage(progress, 'cover_letter_zh', translate_cover_letter,
+                                        cover_letter_md, llm_options, payload=markdown_payload)
+    return cover_letter_md, chinese_cover_letter_md
+
+def cached_render(htmls, options, render):
+    """Returns the cached PDF for ``htmls`` and ``options``, calling ``render()`` on a miss."""
+    if render_cache is None:
+        return render()
+    key = render_cache.key(pdf_renderer.name, htmls, options)
+    pdf = render_cache.get(key)
+    if pdf is None:
+        pdf = render()
+        render_cache.set(key, pdf)
+    return pdf
+
+def render_pdf(html, options, cancel_token=None):
+    """Renders HTML to PDF bytes with the configured ``pdf_renderer``."""
+    return cached_render([html], options, lambda: pdf_renderer.render(html, options, cancel_token))
+
+def render_pdf_bundle(htmls, options, cancel_token=None):
+    """Renders several HTML documents into one PDF with the configured ``pdf_renderer``."""
+    return cached_render(list(htmls), options, lambda: pdf_renderer.render_bundle(htmls, options, cancel_token))
+
+def write_pdf(html, path, options, timings=None, name='pdf', cancel_token=None):
+    """Renders HTML to a PDF file and returns the PDF bytes."""
+    if cancel_token is not None:
+        cancel_token.check()
+    with timed(timings, f'pdf_render:{name}'):
+        pdf = render_pdf(html, options, cancel_token)
+    with timed(timings, f'disk_write:{name}'):
+        with open(path, 'wb') as f:
+            f.write(pdf)
+    return pdf
+
+def write_bundle(htmls, path, options, document_futures, timings=None, name='bundle', cancel_token=None):
+    """Renders a bundle of documents into one PDF file in a single renderer pass.
+
+    If that fails, the separately rendered documents (``document_futures``) are
+    concatenated in memory instead.
+    """
+    if cancel_token is not None:
+        cancel_token.check()
+    try:
+        with timed(timings, f'pdf_render:{name}'):
+            pdf = render_pdf_bundle(htmls, options, cancel_token)
+    except Cancelled:
+        raise
+    except Exception as e:
+        logging.warning(f"Rendering bundle {name} failed, merging its documents instead: {e}")
+        with timed(timings, f'pdf_merge:{name}'):
+            pdf = merge_pdfs([future.result() for future in document_futures])
+    with timed(timings, f'disk_write:{name}'):
+        with open(path, 'wb') as f:
+            f.write(pdf)
+
+def render_deferred(htmls, options):
+    """Renders a PDF deferred by lazy mode: one document, or a bundle merged in memory if its pass fails."""
+    if len(htmls) == 1:
+        return render_pdf(htmls[0], options)
+    try:
+        return render_pdf_bundle(htmls, options)
+    except Exception as e:
+        logging.warning(f"Rendering deferred bundle failed, merging its documents instead: {e}")
+        return merge_pdfs([render_pdf(html, options) for html in htmls])
+
+def process_job_application(job_description, job_source='indeed', concurrent=None, progress=None,
+                            use_cache=True, hedge=False, generation_mode=None, timings=None, cancel_token=None,
+                            lazy_pdf=None, batch=False):
+    """Process job application and generate all necessary documents.
+
+    In concurrent mode the job info extraction, the CV and the cover letter chain
+    (English letter followed by its translation) run in parallel on ``llm_executor``
+    (``batch_llm_executor`` when ``batch=True``), so the wall-clock time is close to the
+    longest chain instead of the sum of all calls.
+
+    ``progress(stage, status, **payload)`` is called as each stage starts and finishes.
+    ``use_cache=False`` bypasses the LLM response cache for every call of this run, and
+    ``hedge=True`` races a second provider when the first one is slow (for interactive use).
+    ``generation_mode='combined'`` replaces the job info, CV and cover letter calls with one call.
+    ``timings``, if given, is a list that receives ``(stage, seconds)`` for every step (benchmarks).
+    Once ``cancel_token`` is cancelled no new LLM call or render starts, a running render is
+    killed, and ``{'status': 'cancelled'}`` is returned with HTTP status 499.
+    ``lazy_pdf=True`` (default PDF_LAZY_RENDER) skips the render stage: the PDF URLs are returned
+    right away and each file is rendered on its first download.
+    """
+    started = time.perf_counter()
+    if concurrent is None:
+        concurrent = CONCURRENT_PIPELINE
+    if lazy_pdf is None:
+        lazy_pdf = PDF_LAZY_RENDER
+    generation_mode = generation_mode or GENERATION_MODE
+    # Every LLM call of this run appends its record here for the per-application summary
+    llm_usage = []
+    llm_options = {'use_cache': use_cache, 'hedge': hedge, 'usage': llm_usage, 'timings': timings,
+                   'cancel_token': cancel_token}
+    try:
+        cv_data = load_cv_data()
+        if cv_data is None:
             return {'status': 'error', 'message': 'No CV data found.'}, 404
+        known_titles = PersonalInfo.query.first().possible_titles
+        # Reuse the job info and CV ranking started while the user was still on the form;
+        # they went through the cache, so a run bypassing it does its own work
+        use_prefetch = PREFETCH_ENABLED and use_cache
+        prefetched = prefetch_cache.get(prefetch_key(job_description, cv_data)) if use_prefetch else None
+        if prefetched:
+            with timed(timings, 'prefetch_wait:cv'):
+                cv_data, cv_context_tokens = prefetched_result(prefetched['cv'], cancel_token)
+        else:
+            cv_data, cv_context_tokens = prompt_cv_data(cv_data, job_description)
 
-        # Prepare CV data
-        cv_data = {
-            'personal_info': {
-                'full_name': personal_info.full_name,
-                'preferred_name': personal_info.preferred_name,
-                'title': personal_info.title,
-                'phone': personal_info.phone,
-                'email': personal_info.email,
-                'location': personal_info.location,
-                'willing_to_relocate': personal_info.willing_to_relocate,
-                'portfolio': personal_info.portfolio,
-                'behance_portfolio': personal_info.behance_portfolio,
-                'github': personal_info.github,
-                'linkedin': personal_info.linkedin,
-                'languages': personal_info.languages,
-                'summary': personal_info.summary,
-                'design_philosophy': personal_info.design_philosophy,
-                'skills': personal_info.skills,
-                'professional_attributes': personal_info.professional_attributes,
-                'references': personal_info.references
-            },
-            'experience': [{
-                'title': exp.title,
-                'company': exp.company,
-                'location': exp.location,
-                'period_start': exp.period_start,
-                'period_end': exp.period_end,
-                'responsibilities': exp.responsibilities,
-                'highlights': exp.highlights
-            } for exp in experiences],
-            'education': [{
-                'degree': edu.degree,
-                'specialization': edu.specialization,
-                'institution': edu.institution,
-                'location': edu.location,
-                'period': edu.period,
-                'highlights': edu.highlights
-            } for edu in education]
-        }
+        def job_info_task():
+            if prefetched:
+                job_info, prefetch_usage = prefetched_result(prefetched['job_info'], cancel_token)
+                # The prefetch's LLM calls count towards this application's usage and cost
+                llm_usage.extend(prefetch_usage)
+                return job_info
+            return extract_job_info(job_description, llm_options, known_titles)
 
         job_details = {'description': job_description, 'source': job_source}
 
         # Generate documents
-        from prompts.cv_prompt import get_cv_prompt
-        cv_prompt = get_cv_prompt(job_details, cv_data)
-        cv_response = unified_generate_content(cv_prompt)
-        cv_json = clean_and_parse_json(cv_response.text)
-        cv_md = json_to_cv_markdown(cv_json)
-        cv_md = cv_md.replace("\\n", "\n")
+        if generation_mode == 'combined':
+            job_title, company_name, cv_md, cover_letter_md = run_stage(
+                progress, 'combined', generate_combined_markdown, job_details, cv_data, llm_options)
+            if progress:
+                progress('job_info', 'done', **job_info_payload((job_title, company_name)))
+                progress('cv', 'done', **markdown_payload(cv_md))
+                progress('cover_letter_en', 'done', **markdown_payload(cover_letter_md))
+            chinese_cover_letter_md = run_stage(progress, 'cover_letter_zh', translate_cover_letter,
+                                                cover_letter_md, llm_options, payload=markdown_payload)
+        elif concurrent:
+            executor = batch_llm_executor if batch else llm_executor
+            job_info_future = executor.submit(run_stage, progress, 'job_info', job_info_task,
+                                              payload=job_info_payload)
+            cv_future = executor.submit(run_stage, progress, 'cv', generate_cv_markdown,
+                                        job_details, cv_data, llm_options, payload=markdown_payload)
+            cover_letters_future = executor.submit(generate_cover_letters, job_details, cv_data, progress, llm_options)
+            job_title, company_name = job_info_future.result()
+            cv_md = cv_future.result()
+            cover_letter_md, chinese_cover_letter_md = cover_letters_future.result()
+        else:
+            job_title, company_name = run_stage(progress, 'job_info', job_info_task, payload=job_info_payload)
+            cv_md = run_stage(progress, 'cv', generate_cv_markdown,
+                              job_details, cv_data, llm_options, payload=markdown_payload)
+            cover_letter_md, chinese_cover_letter_md = generate_cover_letters(job_details, cv_data, progress, llm_options)
 
-        from prompts.cl_prompt import get_cl_prompt
-        cl_prompt = get_cl_prompt(job_details, cv_data)
-        cl_response = unified_generate_content(cl_prompt)
-        cl_json = clean_and_parse_json(cl_response.text)
-        cover_letter_md = json_to_cl_markdown(cl_json)
-        cover_letter_md = cover_letter_md.replace("\\n", "\n")
+        # --- Sanitize job title for filename ---
+        def sanitize_filename(name):
+            name = re.sub(r'[\\/*?:"<>|]', "", name)
+            name = name.replace(' ', '_')
+            return name
 
-        from prompts.cn_prompt import get_cn_prompt
-        cn_prompt = get_cn_prompt(cover_letter_md)
-        cn_response = unified_generate_content(cn_prompt)
-        chinese_cover_letter_md = cn_response.text.strip()
-        chinese_cover_letter_md = chinese_cover_letter_md.replace("\\n", "\n")
+        safe_job_title = sanitize_filename(job_title)
 
         # Generate PDFs
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -680,70 +1348,205 @@ def process_job_application(job_description, job_source='indeed'):
         os.makedirs(output_dir, exist_ok=True)
 
         extras = ["tables", "break-on-newline", "cuddled-lists", "fenced-code-blocks", "header-ids", "markdown-in-html", "metadata", "strike", "task_list"]
-        cv_html_content = markdown2.markdown(cv_md, extras=extras)
-        cover_letter_en_html_content = markdown2.markdown(cover_letter_md, extras=extras)
-        cover_letter_zh_html_content = markdown2.markdown(chinese_cover_letter_md, extras=extras)
-
-        cv_html = render_template('pdf_template.html', content=cv_html_content)
-        cover_letter_en_html = render_template('letter_template.html', content=cover_letter_en_html_content)
-        cover_letter_zh_html = render_template('letter_template.html', content=cover_letter_zh_html_content)
-
-        pdf_options = {
-            'page-size': 'Letter',
-            'margin-top': '0.75in',
-            'margin-right': '0.75in',
-            'margin-bottom': '0.75in',
-            'margin-left': '0.75in',
-            'encoding': 'UTF-8',
-            'no-outline': None,
-            'enable-local-file-access': None
-        }
+        with timed(timings, 'markdown_html:cv'):
+            cv_html_content = markdown2.markdown(cv_md, extras=extras)
+        with timed(timings, 'markdown_html:cover_letter_en'):
+            cover_letter_en_html_content = markdown2.markdown(cover_letter_md, extras=extras)
+        with timed(timings, 'markdown_html:cover_letter_zh'):
+            cover_letter_zh_html_content = markdown2.markdown(chinese_cover_letter_md, extras=extras)
+
+        with timed(timings, 'template_render:cv'):
+            cv_html = render_template('pdf_template.html', content=cv_html_content)
+        with timed(timings, 'template_render:cover_letter_en'):
+            cover_letter_en_html = render_template('letter_template.html', content=cover_letter_en_html_content)
+        with timed(timings, 'template_render:cover_letter_zh'):
+            cover_letter_zh_html = render_template('letter_template.html', content=cover_letter_zh_html_content)
+
+        # Get server URL from environment or use default
+        server_url = os.getenv('SERVER_URL', 'http://localhost:5001')
+
+        def url_payload(filename):
+            return lambda _: {'url': f'{server_url}/output/{filename}'}
 
         # Generate PDF files
-        cv_pdf = pdfkit.from_string(cv_html, False, configuration=PDFKIT_CONFIG, options=pdf_options)
         cv_filename = f'cv_{safe_job_title}_{timestamp}.pdf'
         cv_path = os.path.join(output_dir, cv_filename)
-        with open(cv_path, 'wb') as f:
-            f.write(cv_pdf)
-
-        cl_en_pdf = pdfkit.from_string(cover_letter_en_html, False, configuration=PDFKIT_CONFIG, options=pdf_options)
         cl_en_filename = f'cover_letter_en_{safe_job_title}_{timestamp}.pdf'
         cl_en_path = os.path.join(output_dir, cl_en_filename)
-        with open(cl_en_path, 'wb') as f:
-            f.write(cl_en_pdf)
-
-        cl_zh_pdf = pdfkit.from_string(cover_letter_zh_html, False, configuration=PDFKIT_CONFIG, options=pdf_options)
         cl_zh_filename = f'cover_letter_zh_{safe_job_title}_{timestamp}.pdf'
         cl_zh_path = os.path.join(output_dir, cl_zh_filename)
-        with open(cl_zh_path, 'wb') as f:
-            f.write(cl_zh_pdf)
-
-        # Generate merged PDF
-        merged_filename = f'merged_application_{safe_job_title}_{timestamp}.pdf'
-        merged_path = os.path.join(output_dir, merged_filename)
-        merge_success = merge_cl_cv_pdf(cl_en_path, cv_path, merged_path)
+        renders = {
+            'cv': (cv_html, cv_path, cv_filename),
+            'cover_letter_en': (cover_letter_en_html, cl_en_path, cl_en_filename),
+            'cover_letter_zh': (cover_letter_zh_html, cl_zh_path, cl_zh_filename)
+        }
+        bundle_files = {name: f'{name}_{safe_job_title}_{timestamp}.pdf' for name in PDF_BUNDLES}
+        if lazy_pdf:
+            with timed(timings, 'pdf_defer_stage'):
+                deferred = {f'{name}_pdf': ([html], path, filename) for name, (html, path, filename) in renders.items()}
+                for name, documents in PDF_BUNDLES.items():
+                    deferred[bundle_key(name)] = ([renders[document][0] for document in documents],
+                                                  os.path.join(output_dir, bundle_files[name]), bundle_files[name])
+                for stage, (htmls, path, filename) in deferred.items():
+                    lazy_renders.defer(path, htmls, PDF_OPTIONS)
+                    if progress:
+                        progress(stage, 'done', url=f'{server_url}/output/{filename}', deferred=True)
+            bundle_urls = {bundle_key(name): f'{server_url}/output/{filename}' for name, filename in bundle_files.items()}
+        else:
+            # The renders are independent processes, so they run side by side on the bounded render pool.
+            # Bundles are submitted after the documents, so a bundle falling back to merging never
+            # waits on a document render that has not started.
+            with timed(timings, 'pdf_render_stage'):
+                render_futures = {
+                    name: render_executor.submit(run_stage, progress, f'{name}_pdf', write_pdf, html, path, PDF_OPTIONS,
+                                                 timings, name, cancel_token, payload=url_payload(filename))
+                    for name, (html, path, filename) in renders.items()
+                }
+                bundle_futures = {}
+                for name, documents in PDF_BUNDLES.items():
+                    bundle_futures[name] = render_executor.submit(
+                        run_stage, progress, bundle_key(name), write_bundle,
+                        [renders[document][0] for document in documents],
+                        os.path.join(output_dir, bundle_files[name]), PDF_OPTIONS,
+                        [render_futures[document] for document in documents], timings, name, cancel_token,
+                        payload=url_payload(bundle_files[name]))
+                for future in render_futures.values():
+                    future.result()
+                bundle_urls = {}
+                for name, future in bundle_futures.items():
+                    try:
+                        future.result()
+                        bundle_urls[bundle_key(name)] = f'{server_url}/output/{bundle_files[name]}'
+                    except Cancelled:
+                        raise
+                    except Exception as e:
+                        logging.error(f"Error creating PDF bundle {name}: {e}")
+                        bundle_urls[bundle_key(name)] = None
+
+        if timings is not None:
+            timings.append(('total', time.perf_counter() - started))
 
-        # Get server URL from environment or use default
-        server_url = os.getenv('SERVER_URL', 'http://localhost:5001')
-        
         # Return file URLs with full server URL
         return {
             'status': 'success',
             'cv_md': cv_md,
             'cover_letter_en_md': cover_letter_md,
             'cover_letter_zh_md': chinese_cover_letter_md,
+            'cv_context_tokens': cv_context_tokens,
+            'llm_usage': summarize_calls(llm_usage),
             'files': {
                 'cv_pdf': f'{server_url}/output/{cv_filename}',
                 'cover_letter_en_pdf': f'{server_url}/output/{cl_en_filename}',
                 'cover_letter_zh_pdf': f'{server_url}/output/{cl_zh_filename}',
-                'merged_pdf': f'{server_url}/output/{merged_filename}' if merge_success else None
+                'merged_pdf': None,
+                **bundle_urls
             }
         }
 
+    except Cancelled as e:
+        logging.info(f"Application pipeline cancelled: {e}")
+        return {'status': 'cancelled', 'message': str(e) or 'Cancelled'}, 499
     except Exception as e:
         logging.error(f"Error in process_job_application: {str(e)}", exc_info=True)
         return {'status': 'error', 'message': str(e)}, 500
 
+def estimate_step(step, prompt_tokens):
+    """Estimates one call from its prompt size and the completions seen so far for the step.
+
+    Costs use the prices of the backend the router would try first.
+    """
+    averages = llm_metrics.step_averages(step)
+    completion_tokens = round(averages['completion_tokens']) if averages else LLM_EXPECTED_OUTPUT_TOKENS
+    provider = llm_router.order()[0]
+    return {
+        'provider': provider,
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cost_usd': round(call_cost(LLM_PRICES, provider, prompt_tokens, completion_tokens), 6),
+        'observed_latency_s': averages['latency_s'] if averages else None
+    }
+
+def estimate_application(job_description, generation_mode=None):
+    """Estimates tokens and cost of each LLM call of an application without calling a provider.
+
+    Completion sizes and latencies come from the calls this worker has already made, falling
+    back to LLM_EXPECTED_OUTPUT_TOKENS. Returns None when no CV is stored yet.
+    """
+    from prompts.cv_prompt import get_cv_prompt
+    from prompts.cl_prompt import get_cl_prompt
+    from prompts.cn_prompt import get_cn_prompt, get_cn_paragraphs_prompt
+    from prompts.combined_prompt import get_combined_prompt
+
+    cv_data = load_cv_data()
+    if cv_data is None:
+        return None
+    generation_mode = generation_mode or GENERATION_MODE
+    known_titles = PersonalInfo.query.first().possible_titles
+    cv_data, cv_context_tokens = prompt_cv_data(cv_data, job_description)
+    job_details = {'description': job_description}
+
+    steps = {}
+    if generation_mode == 'combined':
+        steps['combined'] = estimate_step('combined', estimate_tokens(get_combined_prompt(job_details, cv_data)))
+    else:
+        if extract_job_info_locally(job_description, known_titles)[2] < JOB_INFO_LOCAL_THRESHOLD:
+            steps['job_info'] = estimate_step('job_info', estimate_tokens(get_job_info_prompt(job_description)))
+        steps['cv'] = estimate_step('cv', estimate_tokens(get_cv_prompt(job_details, cv_data)))
+        steps['cover_letter_en'] = estimate_step('cover_letter_en', estimate_tokens(get_cl_prompt(job_details, cv_data)))
+    # The translation prompt wraps the English letter, which is about one completion long
+    letter_tokens = estimate_step('cover_letter_en', 0)['completion_tokens']
+    if TRANSLATION_MEMORY_ENABLED:
+        # Only paragraphs missing from the translation memory are sent; the letter is not
+        # written yet, so the share of paragraphs reused so far stands in for its hits
+        new_tokens = round(letter_tokens * (1 - translation_memory.reuse_rate()))
+        if new_tokens:
+            steps['cover_letter_zh'] = estimate_step(
+                'cover_letter_zh', estimate_tokens(get_cn_paragraphs_prompt([])) + new_tokens)
+    else:
+        steps['cover_letter_zh'] = estimate_step('cover_letter_zh', estimate_tokens(get_cn_prompt('')) + letter_tokens)
+
+    return {
+        'generation_mode': generation_mode,
+        'cv_context_tokens': cv_context_tokens,
+        'prompt_tokens': sum(step['prompt_tokens'] for step in steps.values()),
+        'completion_tokens': sum(step['completion_tokens'] for step in steps.values()),
+        'cost_usd': round(sum(step['cost_usd'] for step in steps.values()), 6),
+        'steps': steps
+    }
+
+# Background pipeline runs for the submit-and-poll mode
+job_queue = JobQueue(
+    app, db, GenerationJob, InflightJob, GenerationBatch, process_job_application,
+    max_workers=int(os.getenv('JOB_WORKERS', '2')),
+    batch_workers=int(os.getenv('BATCH_WORKERS', '2')),
+    retention_hours=int(os.getenv('JOB_RETENTION_HOURS', '24'))
+)
+
+# An SSE stream holds a request open for the whole job, which would time out and tie up a
+# sync worker; only enable it when running threaded or async workers (see the Dockerfile)
+JOB_EVENTS_ENABLED = os.getenv('JOB_EVENTS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+
+def wants_async(data):
+    """Checks whether the client asked for the submit-and-poll mode."""
+    value = data.get('async', request.args.get('async', False))
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def pipeline_options(data):
+    """Extracts the per-request pipeline options from the JSON body."""
+    return {
+        'use_cache': str(data.get('no_cache', False)).lower() not in ('1', 'true', 'yes'),
+        'hedge': str(data.get('hedge', LLM_HEDGE)).lower() in ('1', 'true', 'yes'),
+        'generation_mode': data.get('generation_mode') if data.get('generation_mode') in GENERATION_MODES else GENERATION_MODE,
+        'lazy_pdf': str(data.get('lazy_pdf', PDF_LAZY_RENDER)).lower() in ('1', 'true', 'yes')
+    }
+
+def queued_response(job_id):
+    return jsonify({
+        'status': 'queued',
+        'job_id': job_id,
+        'status_url': url_for('job_status', job_id=job_id)
+    }), 202
+
 @app.route('/submit_job', methods=['POST'])
 @login_required
 def submit_job():
@@ -758,7 +1561,16 @@ def submit_job():
         if not job_description:
             return jsonify({'status': 'error', 'message': 'Job description is required'}), 400
 
-        result = process_job_application(job_description, job_source)
+        # Identical submissions in flight (double clicks, retries) share one pipeline run
+        options = pipeline_options(data)
+        request_key = application_request_key(job_description, job_source, options)
+        if request_key is None:
+            return jsonify({'status': 'error', 'message': 'No CV data found.'}), 404
+
+        if wants_async(data):
+            return queued_response(job_queue.submit(job_description, job_source, options, request_key))
+
+        result = job_queue.run(job_description, job_source, options, request_key)
         
         if isinstance(result, tuple):
             return jsonify(result[0]), result[1]
@@ -768,6 +1580,26 @@ def submit_job():
         logging.error(f"Error in submit_job: {str(e)}", exc_info=True)
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/prefetch_job', methods=['POST'])
+@login_required
+def prefetch_job():
+    """Starts work for the job description on the form before it is submitted."""
+    data = request.get_json(silent=True) or {}
+    job_description = data.get('job_description', '').strip()
+    if not PREFETCH_ENABLED:
+        return jsonify({'status': 'disabled'})
+    if len(job_description) < PREFETCH_MIN_CHARS:
+        return jsonify({'status': 'error', 'message': 'Job description is too short to prefetch'}), 400
+    try:
+        prefetched = prefetch_application(job_description)
+        if prefetched is None:
+            return jsonify({'status': 'error', 'message': 'No CV data found.'}), 404
+        key, started = prefetched
+        return jsonify({'status': 'started' if started else 'running', 'key': key}), 202
+    except Exception as e:
+        logging.error(f"Error in prefetch_job: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @app.route('/api/generate_application', methods=['POST'])
 @require_api_key
 def generate_application():
@@ -797,15 +1629,32 @@ def generate_application():
                 'message': 'Job Description is not valid. It should be at least 100 characters long.'
             }), 400
 
-        result = process_job_application(job_description, ad_source)
+        options = pipeline_options(data)
+        if str(data.get('dry_run', False)).lower() in ('1', 'true', 'yes'):
+            # Estimate tokens and cost without calling any provider
+            estimate = estimate_application(job_description, options['generation_mode'])
+            if estimate is None:
+                return jsonify({'status': 'error', 'message': 'No CV data found.'}), 404
+            return jsonify({'status': 'success', 'dry_run': True, 'estimate': estimate})
+
+        # Identical submissions in flight (double clicks, retries) share one pipeline run
+        request_key = application_request_key(job_description, ad_source, options)
+        if request_key is None:
+            return jsonify({'status': 'error', 'message': 'No CV data found.'}), 404
+
+        if wants_async(data):
+            return queued_response(job_queue.submit(job_description, ad_source, options, request_key))
+
+        result = job_queue.run(job_description, ad_source, options, request_key)
         
         if isinstance(result, tuple):
             return jsonify(result[0]), result[1]
             
-        # Return only the file URLs for API calls
+        # Return only the file URLs (and the LLM usage summary) for API calls
         return jsonify({
             'status': 'success',
-            'files': result.get('files', {})
+            'files': result.get('files', {}),
+            'llm_usage': result.get('llm_usage')
         })
         
     except Exception as e:
@@ -815,11 +1664,218 @@ def generate_application():
             'message': str(e)
         }), 500
 
+@app.route('/api/batch_applications', methods=['POST'])
+@require_api_key
+def batch_applications():
+    """Queue a list of job descriptions and return one batch id for polling."""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('items'), list) or not data['items']:
+            return jsonify({
+                'status': 'error',
+                'message': 'Expected a non-empty "items" list'
+            }), 400
+
+        max_items = int(os.getenv('BATCH_MAX_ITEMS', '50'))
+        if len(data['items']) > max_items:
+            return jsonify({
+                'status': 'error',
+                'message': f'A batch may contain at most {max_items} items.'
+            }), 400
+
+        entries = []
+        for item in data['items']:
+            if not isinstance(item, dict):
+                entries.append({'job_source': None, 'error': 'Each item must be an object with a job_description.'})
+                continue
+            job_description = item.get('job_description', '')
+            ad_source = item.get('ad_source', 'indeed')
+            if not isinstance(job_description, str) or len(job_description.strip()) < 100:
+                entries.append({
+                    'job_source': ad_source,
+                    'error': 'Job Description is not valid. It should be at least 100 characters long.'
+                })
+                continue
+            options = pipeline_options(dict(data, **item))
+            request_key = application_request_key(job_description, ad_source, options)
+            if request_key is None:
+                return jsonify({'status': 'error', 'message': 'No CV data found.'}), 404
+            entries.append({
+                'job_description': job_description,
+                'job_source': ad_source,
+                'options': options,
+                'request_key': request_key
+            })
+
+        batch_id = job_queue.submit_batch(entries)
+        return jsonify({
+            'status': 'queued',
+            'batch_id': batch_id,
+            'status_url': url_for('batch_status', batch_id=batch_id)
+        }), 202
+
+    except Exception as e:
+        logging.error(f"Error in batch_applications: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/batches/<batch_id>', methods=['GET'])
+@require_api_key
+def batch_status(batch_id):
+    """Report per-item status and file URLs of a batch."""
+    batch = job_queue.get_batch(batch_id)
+    if batch is None:
+        return jsonify({'status': 'error', 'message': 'Batch not found'}), 404
+    return jsonify(batch)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+@require_api_key
+def job_status(job_id):
+    """Report the per-stage status of a queued job and its file URLs once done."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+@require_api_key
+def cancel_job(job_id):
+    """Cancel a queued or running job; a running pipeline stops before its next LLM call or render."""
+    cancelled = job_queue.cancel(job_id)
+    if cancelled is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    if not cancelled:
+        return jsonify({'status': 'error', 'message': 'Job already finished'}), 409
+    return jsonify({'status': 'cancelled', 'job_id': job_id})
+
+def sse_event(event, data):
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+@require_api_key
+def job_events(job_id):
+    """Stream stage updates of a queued job as Server-Sent Events until it finishes.
+
+    With ``?cancel_on_disconnect=true`` the job is cancelled when the client goes away
+    (noticed at the next event or keep-alive write). Disabled unless JOB_EVENTS_ENABLED is set;
+    clients then poll the status URL instead.
+    """
+    if not JOB_EVENTS_ENABLED:
+        return jsonify({'status': 'error', 'message': 'Event streams are disabled; poll the status URL'}), 404
+    if job_queue.get(job_id) is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    cancel_on_disconnect = request.args.get('cancel_on_disconnect', '').lower() in ('1', 'true', 'yes')
+
+    def generate():
+        finished = False
+        try:
+            yield from stream()
+            finished = True
+        finally:
+            if cancel_on_disconnect and not finished:
+                job_queue.cancel(job_id, 'Client disconnected')
+
+    def stream():
+        sent = {}
+        deadline = time.monotonic() + int(os.getenv('JOB_EVENTS_TIMEOUT', '600'))
+        last_write = time.monotonic()
+        while time.monotonic() < deadline:
+            # The job may be running in another worker, so re-read the shared row
+            db.session.expire_all()
+            job = job_queue.get(job_id)
+            if job is None:
+                yield sse_event('failed', {'message': 'Job not found'})
+                return
+            for stage, state in job['stages'].items():
+                if sent.get(stage) != state:
+                    sent[stage] = state
+                    last_write = time.monotonic()
+                    yield sse_event('stage', dict(state, stage=stage))
+            if job['status'] == 'success':
+                yield sse_event('done', job['result'])
+                return
+            if job['status'] == 'error':
+                yield sse_event('failed', {'message': job['error']})
+                return
+            if job['status'] == 'cancelled':
+                yield sse_event('failed', {'message': job['error'] or 'Cancelled', 'cancelled': True})
+                return
+            if time.monotonic() - last_write > 15:
+                # Keep proxies from closing an idle connection
+                last_write = time.monotonic()
+                yield ": keep-alive\n\n"
+            time.sleep(0.5)
+        yield sse_event('failed', {'message': 'Timed out waiting for job'})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/llm_cache/stats', methods=['GET'])
+@require_api_key
+def llm_cache_stats():
+    """Report hit/miss counters of the LLM response cache and translation memory for this worker."""
+    return jsonify({
+        'status': 'success',
+        'enabled': LLM_CACHE_ENABLED,
+        'stats': llm_cache.stats(),
+        'translation_memory': dict(translation_memory.stats(), enabled=TRANSLATION_MEMORY_ENABLED),
+        'prefetch': dict(prefetch_cache.stats(), enabled=PREFETCH_ENABLED)
+    })
+
+@app.route('/api/metrics', methods=['GET'])
+@require_api_key
+def llm_call_metrics():
+    """Report token, latency, retry, fallback and cost aggregates of LLM calls for this worker."""
+    return jsonify({'status': 'success', 'metrics': llm_metrics.stats()})
+
+@app.route('/api/render_stats', methods=['GET'])
+@require_api_key
+def render_stats():
+    """Report renderer counts and pool state, render cache hit rate and bytes saved, and lazy renders for this worker."""
+    return jsonify({'status': 'success', 'renderer': pdf_renderer.stats(),
+                    'cache': render_cache.stats() if render_cache is not None else None,
+                    'lazy': lazy_renders.stats()})
+
+@app.route('/api/rate_limits', methods=['GET'])
+@require_api_key
+def rate_limit_stats():
+    """Report the client-side rate limiter state of each provider for this worker."""
+    return jsonify({'status': 'success', 'limiters': rate_limiters.stats()})
+
+@app.route('/api/provider_health', methods=['GET'])
+@require_api_key
+def provider_health():
+    """Report circuit state, recent latency and errors of each backend and the routing order for this worker."""
+    return jsonify({
+        'status': 'success',
+        'routing': llm_router.stats(),
+        'providers': {
+            provider: {
+                'model': llm_backends[provider].model_name,
+                'circuit': circuit_breakers[provider].stats(),
+                'latency': provider_latencies[provider].stats(),
+                'outcomes': provider_outcomes[provider].stats()
+            } for provider in LLM_PROVIDERS
+        }
+    })
+
 @app.route('/output/<path:filename>')
 @require_api_key
 def static_file(filename):
-    """Allow file download for both logged-in users and API users with valid key."""
+    """Allow file download for both logged-in users and API users with valid key.
+
+    A PDF deferred by lazy mode is rendered here on its first request.
+    """
     output_dir = os.path.join(app.instance_path, 'output')
+    path = safe_join(output_dir, filename)
+    if path and lazy_renders.pending(path):
+        try:
+            lazy_renders.materialize(path, render_deferred)
+        except Exception as e:
+            logging.error(f"Error rendering deferred file {filename}: {str(e)}")
+            return jsonify({'status': 'error', 'message': f'Could not render file: {str(e)}'}), 500
     try:
         return send_from_directory(output_dir, filename)
     except Exception as e:
@@ -833,56 +1889,13 @@ def static_file(filename):
 @login_required
 def get_cv():
     try:
-        personal_info = PersonalInfo.query.first()
-        experiences = Experience.query.all()
-        education = Education.query.all()
-
-        if not personal_info:
+        cv_data = load_cv_data()
+        if cv_data is None:
             return jsonify({
                 'status': 'error',
                 'message': 'No CV data found'
             }), 404
 
-        # Convert to dictionary format
-        cv_data = {
-            'personal_info': {
-                'full_name': personal_info.full_name,
-                'preferred_name': personal_info.preferred_name,
-                'title': personal_info.title,
-                'phone': personal_info.phone,
-                'email': personal_info.email,
-                'location': personal_info.location,
-                'willing_to_relocate': personal_info.willing_to_relocate,
-                'portfolio': personal_info.portfolio,
-                'behance_portfolio': personal_info.behance_portfolio,
-                'github': personal_info.github,
-                'linkedin': personal_info.linkedin,
-                'languages': personal_info.languages,
-                'summary': personal_info.summary,
-                'design_philosophy': personal_info.design_philosophy,
-                'skills': personal_info.skills,
-                'professional_attributes': personal_info.professional_attributes,
-                'references': personal_info.references
-            },
-            'experience': [{
-                'title': exp.title,
-                'company': exp.company,
-                'location': exp.location,
-                'period_start': exp.period_start,
-                'period_end': exp.period_end,
-                'responsibilities': exp.responsibilities,
-                'highlights': exp.highlights
-            } for exp in experiences],
-            'education': [{
-                'degree': edu.degree,
-                'specialization': edu.specialization,
-                'institution': edu.institution,
-                'location': edu.location,
-                'period': edu.period,
-                'highlights': edu.highlights
-            } for edu in education]
-        }
-
         return jsonify({
             'status': 'success',
             'data': cv_data
@@ -0,0 +1,79 @@
+"""Compare end-to-end latency and token usage of the per-step and combined generation modes.
+
+Usage:
+    python benchmarks/generation_modes.py --runs 3 --job-file job.txt
+
+Runs the full pipeline (including PDF rendering) against the configured providers with
+the LLM cache bypassed, and prints a JSON summary per mode.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app_04
+
+SAMPLE_JOB_DESCRIPTION = """
+Senior Python Developer - Acme Analytics (Toronto, ON)
+
+Acme Analytics is looking for a Senior Python Developer to build data pipelines and
+internal web tools. You will design REST APIs with Flask, maintain PostgreSQL schemas,
+automate reporting, and mentor junior developers.
+
+Requirements:
+- 5+ years of professional Python experience
+- Flask or Django, SQLAlchemy, REST API design
+- Experience with cloud deployment (Docker, AWS or GCP)
+- Strong communication skills; Cantonese or Mandarin is an asset
+"""
+
+
+def run_mode(mode, job_description, runs):
+    calls = prompt_tokens = completion_tokens = 0
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        with app_04.app.app_context():
+            result = app_04.process_job_application(
+                job_description, 'indeed', use_cache=False, generation_mode=mode)
+        latencies.append(time.perf_counter() - started)
+        if isinstance(result, tuple):
+            raise RuntimeError(result[0].get('message'))
+        usage = result['llm_usage']
+        calls += usage['calls']
+        prompt_tokens += usage['prompt_tokens']
+        completion_tokens += usage['completion_tokens']
+
+    return {
+        'mode': mode,
+        'runs': runs,
+        'latency_mean_s': round(statistics.mean(latencies), 3),
+        'latency_median_s': round(statistics.median(latencies), 3),
+        'calls_per_run': calls / runs,
+        'prompt_tokens_per_run': prompt_tokens / runs,
+        'completion_tokens_per_run': completion_tokens / runs
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--job-file', help='Text file with the job description to use')
+    parser.add_argument('--modes', default=','.join(app_04.GENERATION_MODES))
+    args = parser.parse_args()
+
+    job_description = SAMPLE_JOB_DESCRIPTION
+    if args.job_file:
+        with open(args.job_file, 'r', encoding='utf-8') as f:
+            job_description = f.read()
+
+    results = [run_mode(mode, job_description, args.runs) for mode in args.modes.split(',')]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""End-to-end pipeline benchmark with a per-stage latency breakdown.
+
+Usage:
+    python benchmarks/pipeline.py --runs 5
+    python benchmarks/pipeline.py --runs 5 --save-baseline benchmarks/baseline.json
+    python benchmarks/pipeline.py --runs 5 --baseline benchmarks/baseline.json --fail-on-regression
+
+Drives process_job_application and the HTTP endpoints around it with synthetic job
+descriptions and CVs of several sizes. It reports p50/p95/p99 per stage: LLM calls,
+JSON parsing, Markdown conversion, template rendering, each PDF render and disk write,
+the PDF merge, and the HTTP round trips.
+
+LLM calls go to the offline mock provider unless --provider live is given. PDFs are
+rendered with the configured wkhtmltopdf. Everything runs in a scratch instance folder,
+so the real database, caches and output folder are left alone. Results are written as
+JSON and can be compared against a saved baseline.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+CV_SIZES = {'small': (2, 3), 'medium': (5, 5), 'large': (12, 8)}  # (experiences, bullets per list)
+JD_SIZES = {'short': 4, 'medium': 12, 'long': 30}  # requirement lines
+
+WORDS = ('Python Flask Django SQL PostgreSQL AWS GCP Docker Kubernetes React TypeScript REST GraphQL '
+         'Airflow Spark Kafka Terraform CI/CD pipelines microservices analytics dashboards testing '
+         'monitoring mentoring stakeholders roadmap migration performance security accessibility').split()
+VERBS = ('Built', 'Designed', 'Led', 'Automated', 'Migrated', 'Optimized', 'Maintained', 'Launched')
+
+
+def synthetic_cv(size, rng):
+    experiences, bullets = CV_SIZES[size]
+
+    def bullet():
+        return f"{rng.choice(VERBS)} {' '.join(rng.sample(WORDS, 5))} for {rng.randint(2, 40)} teams"
+
+    return {
+        'personal_info': {
+            'full_name': 'Alex Benchmark',
+            'title': ['Software Engineer', 'Data Engineer'],
+            'email': 'alex@example.com',
+            'phone': '+1 555 000 0000',
+            'location': 'Toronto, ON',
+            'github': 'https://github.com/example',
+            'summary': ' '.join(rng.choice(WORDS) for _ in range(60)),
+            'design_philosophy': ' '.join(rng.choice(WORDS) for _ in range(40)),
+            'skills': {'Engineering': [{'name': word, 'experience_years': rng.randint(1, 10)}
+                                       for word in rng.sample(WORDS, min(len(WORDS), 4 * experiences))]},
+            'professional_attributes': ['Clear communicator', 'Ownership', 'Mentoring'],
+            'possible_titles': ['Software Engineer', 'Data Engineer', 'Backend Developer'],
+            'references': 'Available on request.'
+        },
+        'experience': [{
+            'title': rng.choice(['Software Engineer', 'Data Engineer', 'Backend Developer']),
+            'company': f'Company {index}',
+            'location': 'Toronto, ON',
+            'period_start': f'{2020 - 2 * index}',
+            'period_end': f'{2022 - 2 * index}',
+            'responsibilities': [bullet() for _ in range(bullets)],
+            'highlights': [bullet() for _ in range(bullets)]
+        } for index in range(experiences)],
+        'education': [{
+            'degree': 'BSc Computer Science',
+            'institution': 'University of Benchmarks',
+            'location': 'Toronto, ON',
+            'period': '2010 - 2014',
+            'highlights': ['Dean\'s list']
+        }]
+    }
+
+
+def synthetic_job_description(size, index, rng):
+    lines = [f'Senior Data Engineer {index}', 'Acme Analytics · Toronto, ON (Hybrid)', '',
+             'Acme Analytics is looking for a Senior Data Engineer to build reliable data products.', '',
+             'Requirements:']
+    lines += [f"- {rng.randint(2, 8)}+ years with {', '.join(rng.sample(WORDS, 3))}" for _ in range(JD_SIZES[size])]
+    lines += ['', 'About Acme Analytics', 'Acme Analytics helps teams make decisions with data.']
+    return '\n'.join(lines)
+
+
+def load_cv(app_04, cv):
+    """Replaces the CV stored in the scratch database."""
+    from models import PersonalInfo, Experience, Education
+    info = dict(cv['personal_info'])
+    PersonalInfo.query.delete()
+    Experience.query.delete()
+    Education.query.delete()
+    app_04.db.session.add(PersonalInfo(**info))
+    for exp in cv['experience']:
+        app_04.db.session.add(Experience(**exp))
+    for edu in cv['education']:
+        app_04.db.session.add(Education(**edu))
+    app_04.db.session.commit()
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(percent / 100.0 * len(ordered)) - 1)]
+
+
+def summarize(samples):
+    return {
+        stage: {
+            'count': len(values),
+            'mean': round(statistics.mean(values), 4),
+            'p50': round(percentile(values, 50), 4),
+            'p95': round(percentile(values, 95), 4),
+            'p99': round(percentile(values, 99), 4)
+        } for stage, values in sorted(samples.items())
+    }
+
+
+def run_http(app_04, client, job_description, samples):
+    headers = {'X-API-Key': app_04.API_KEY}
+    body = {'job_description': job_description, 'ad_source': 'indeed', 'no_cache': True}
+
+    started = time.perf_counter()
+    response = client.post('/api/generate_application', json=body, headers=headers)
+    if response.status_code != 200:
+        raise RuntimeError(f'generate_application returned {response.status_code}: {response.get_json()}')
+    samples.setdefault('http:generate_application', []).append(time.perf_counter() - started)
+
+    # Async submission followed by polling, like the web UI without SSE
+    started = time.perf_counter()
+    response = client.post('/api/generate_application', json=dict(body, **{'async': True}), headers=headers)
+    submitted = time.perf_counter()
+    status_url = response.get_json()['status_url']
+    while True:
+        job = client.get(status_url, headers=headers).get_json()
+        if job['status'] in app_04.job_queue.FINISHED:
+            break
+        time.sleep(0.05)
+    if job['status'] != 'success':
+        raise RuntimeError(f"Async job {job['status']}: {job.get('error')}")
+    samples.setdefault('http:async_submit', []).append(submitted - started)
+    samples.setdefault('http:async_roundtrip', []).append(time.perf_counter() - started)
+
+
+def run_benchmark(args):
+    import app_04
+
+    rng = random.Random(args.seed)
+    scenarios = {}
+    overall = {}
+    client = app_04.app.test_client()
+    for cv_size in args.cv_sizes.split(','):
+        cv = synthetic_cv(cv_size, rng)
+        with app_04.app.app_context():
+            load_cv(app_04, cv)
+        for jd_size in args.jd_sizes.split(','):
+            samples = {}
+            for run in range(args.runs):
+                job_description = synthetic_job_description(jd_size, run, rng)
+                timings = []
+                with app_04.app.app_context():
+                    result = app_04.process_job_application(
+                        job_description, 'indeed', use_cache=False, generation_mode=args.mode, timings=timings)
+                if isinstance(result, tuple):
+                    raise RuntimeError(result[0].get('message'))
+                for stage, seconds in timings:
+                    samples.setdefault(stage, []).append(seconds)
+                if args.http:
+                    run_http(app_04, client, job_description, samples)
+            for stage, values in samples.items():
+                overall.setdefault(stage, []).extend(values)
+            scenarios[f'cv={cv_size},jd={jd_size}'] = summarize(samples)
+            print(f'cv={cv_size} jd={jd_size}: total p50 {scenarios[f"cv={cv_size},jd={jd_size}"]["total"]["p50"]}s',
+                  file=sys.stderr)
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'provider': 'mock' if app_04.LLM_MOCK else 'live',
+            'generation_mode': args.mode or app_04.GENERATION_MODE,
+            'concurrent_pipeline': app_04.CONCURRENT_PIPELINE,
+            'runs': args.runs,
+            'seed': args.seed,
+            'mock_latency': os.getenv('MOCK_LATENCY'),
+            'mock_latency_jitter': os.getenv('MOCK_LATENCY_JITTER'),
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'stages': summarize(overall),
+        'scenarios': scenarios
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Lists stages whose p50 or p95 grew by more than ``threshold`` (and ``min_delta`` seconds)."""
+    rows, regressions = [], []
+    for stage, current in results['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if previous is None:
+            continue
+        row = {'stage': stage}
+        for key in ('p50', 'p95'):
+            change = (current[key] - previous[key]) / previous[key] if previous[key] else 0.0
+            row[key] = {'baseline': previous[key], 'current': current[key], 'change': round(change, 3)}
+            if change > threshold and current[key] - previous[key] > min_delta:
+                regressions.append(f'{stage} {key}')
+        rows.append(row)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3, help='Pipelines per CV/job description size pair')
+    parser.add_argument('--cv-sizes', default=','.join(CV_SIZES))
+    parser.add_argument('--jd-sizes', default=','.join(JD_SIZES))
+    parser.add_argument('--mode', choices=['per_step', 'combined'], help='Generation mode (default: GENERATION_MODE)')
+    parser.add_argument('--provider', choices=['mock', 'live'], default='mock')
+    parser.add_argument('--no-http', dest='http', action='store_false', help='Skip the HTTP endpoint round trips')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/pipeline_<timestamp>.json)')
+    parser.add_argument('--baseline', help='Baseline results file to compare against')
+    parser.add_argument('--save-baseline', help='Also write the results to this baseline file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Relative slowdown reported as a regression')
+    parser.add_argument('--min-delta', type=float, default=0.005, help='Ignore slowdowns smaller than this (seconds)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    os.environ['INSTANCE_PATH'] = tempfile.mkdtemp(prefix='jobhunter-bench-')
+    # Identical documents would be served from the render cache and hide the real render times
+    os.environ.setdefault('PDF_RENDER_CACHE_ENABLED', 'false')
+    if args.provider == 'mock':
+        os.environ['LLM_PROVIDER'] = 'mock'
+        os.environ.setdefault('MOCK_LATENCY', '0.5')
+        os.environ.setdefault('MOCK_LATENCY_JITTER', '0.2')
+        # The mock has no quota; keep the client-side RPM/TPM buckets from pacing the runs
+        for name in ('GEMINI_RPM', 'GEMINI_TPM', 'OPENAI_RPM', 'OPENAI_TPM'):
+            os.environ.setdefault(name, '0')
+
+    results = run_benchmark(args)
+
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"pipeline_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    for path in filter(None, [output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    print(f'Results written to {output}', file=sys.stderr)
+
+    report = {'stages': results['stages']}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['comparison'], regressions = compare(results, baseline, args.threshold, args.min_delta)
+        report['regressions'] = regressions
+    print(json.dumps(report, indent=2))
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -103,4 +103,31 @@ class JobApplication(db.Model, Serializer):
     cv_path = db.Column(db.String(200))
     cover_letter_en_path = db.Column(db.String(200))
     cover_letter_zh_path = db.Column(db.String(200))
-    status = db.Column(db.String(50), default='pending') 
\ No newline at end of file
+    status = db.Column(db.String(50), default='pending') 
+
+class GenerationJob(db.Model, Serializer):
+    """A queued run of the application pipeline, polled through /api/jobs/<id>."""
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(20), default='queued')  # queued, running, success, error, cancelled
+    job_description = db.Column(db.Text, nullable=False)
+    job_source = db.Column(db.String(100))
+    options = db.Column(JsonEncodedDict)
+    stages = db.Column(JsonEncodedDict)
+    result = db.Column(JsonEncodedDict)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class InflightJob(db.Model):
+    """Claims a request key while its job runs, so identical submissions attach to it."""
+    request_key = db.Column(db.String(64), primary_key=True)
+    job_id = db.Column(db.String(32), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class GenerationBatch(db.Model, Serializer):
+    """A list of jobs submitted together through /api/batch_applications."""
+    id = db.Column(db.String(32), primary_key=True)
+    items = db.Column(JsonEncodedDict)  # [{'job_id': ..., 'job_source': ...} or {'error': ...}]
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
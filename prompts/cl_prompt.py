@@ -1,4 +1,9 @@
 import json
+from utils.cv_relevance import compact_json
+from utils.json_parser import Schema
+
+COVER_LETTER_SPEC = {'greeting?': str, 'body': [str], 'closing?': str, 'signature?': str}
+COVER_LETTER_SCHEMA = Schema(COVER_LETTER_SPEC)
 
 def get_cl_prompt(job_details, cv_data):
     return f"""
@@ -8,7 +13,7 @@ You are a world-class cover letter writer with a high emotional IQ. Your task is
 {json.dumps(job_details, indent=2)}
 
 **User's Full CV Information (for context):**
-{json.dumps(cv_data, indent=2, ensure_ascii=False)}
+{compact_json(cv_data)}
 
 **Instructions & Logic:**
 
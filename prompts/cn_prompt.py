@@ -1,4 +1,7 @@
 import json
+from utils.json_parser import Schema
+
+TRANSLATIONS_SCHEMA = Schema({'translations': [str]})
 
 def get_cn_prompt(cover_letter_md):
     return f"""
@@ -15,4 +18,24 @@ The translated version must also be in pure Markdown format.
 4.  The output must be only the translated Markdown text.
 
 **IMPORTANT:** Respond with ONLY the translated cover letter in pure Markdown. Do not include `\```html` or `\```markdown` wrappers, explanations, or any other text.
-"""
\ No newline at end of file
+"""
+
+def get_cn_paragraphs_prompt(paragraphs):
+    return f"""
+Translate each of the following English cover letter paragraphs in Markdown format into Traditional Chinese (繁體中文).
+The paragraphs are given as a JSON array; translate every item on its own, in the same order.
+
+**English Paragraphs (JSON array of Markdown strings):**
+{json.dumps(paragraphs, ensure_ascii=False)}
+
+**Translation Requirements:**
+1.  Translate all professional text into natural and fluent Traditional Chinese (繁體中文).
+2.  Keep all names (e.g., company names, personal names), dates, and links in their original English form.
+3.  Preserve the Markdown formatting of each paragraph exactly (e.g., `###` headings, `**bold**` text, etc.).
+4.  Return exactly {len(paragraphs)} translations, one per paragraph. Do not merge or split paragraphs.
+
+**JSON Output Format:**
+{{"translations": ["string (translated paragraph 1)", "string (translated paragraph 2)"]}}
+
+**IMPORTANT:** Respond with ONLY the JSON object. Do not include `\\```json` wrappers, explanations, or any other text.
+"""
@@ -0,0 +1,91 @@
+from utils.cv_relevance import compact_json
+from utils.json_parser import Schema
+from prompts.cv_prompt import CV_SPEC
+from prompts.cl_prompt import COVER_LETTER_SPEC
+
+COMBINED_SCHEMA = Schema({
+    'job_info?': {'job_title?': str, 'company_name?': str},
+    'cv': CV_SPEC,
+    'cover_letter': COVER_LETTER_SPEC
+})
+
+def get_combined_prompt(job_details, cv_data):
+    return f"""
+You are an expert ATS-optimized resume writer and a world-class cover letter writer with a high emotional IQ. Your task is to analyze the user's information and the job description once, then generate a single structured JSON object containing the job information, a highly tailored CV and a persuasive cover letter.
+
+**Job Description:**
+{job_details['description']}
+
+**User's Full CV Information:**
+{compact_json(cv_data)}
+
+**Instructions & Logic:**
+
+1.  **Job Information:** Extract the job title and the company name from the job description. If a value is not found, use "N/A".
+2.  **CV - Analyze Job Type:** Determine if the job is primarily 'IT/Technical' or 'Design/Creative'.
+    *   If the job is 'IT/Technical', include the `github` URL in the `personal_info` object.
+    *   If the job is 'Design/Creative', include the `portfolio` URL.
+    *   If it's neither or a mix, do not include either link to keep it focused.
+3.  **CV - Intelligent Summary:** Craft a **Professional Summary** that is a perfect synthesis of the user's strengths as they relate to the job's key requirements. Do not just list skills; create a compelling narrative.
+4.  **CV - Relevant Experience:** Select **only the most relevant** positions for this job. For each selected position, rewrite the `responsibilities` to subtly embed keywords from the job description. The language must sound natural and achievement-oriented.
+5.  **CV - Full Education History:** Include all education entries provided by the user, do not omit any.
+6.  **Cover Letter - Skill Gap Analysis:** Extract the top 3-4 most critical skills of the job. For each one:
+    *   **If the user HAS the skill:** Write a compelling sentence or two showcasing this skill with an example from their experience.
+    *   **If the user LACKS the skill:** Do not lie. Acknowledge the required skill, highlight the user's *closest related skill*, and express a strong, credible desire to learn and bridge the gap.
+7.  **Cover Letter - Body:** Weave these sentences into 1-2 coherent body paragraphs. The tone should be confident, competent, and honest.
+
+**JSON Output Format:**
+The JSON object must follow this exact structure. Note that the `skills` field of the CV has been intentionally omitted.
+
+```json
+{{
+  "job_info": {{
+    "job_title": "string",
+    "company_name": "string"
+  }},
+  "cv": {{
+    "personal_info": {{
+      "full_name": "string",
+      "title": "string (The most relevant title for the job)",
+      "location": "string",
+      "phone": "string",
+      "email": "string",
+      "portfolio": "string (URL, ONLY if Design/Creative job)",
+      "github": "string (URL, ONLY if IT/Technical job)"
+    }},
+    "summary": "string (A compelling, tailored summary with keywords integrated.)",
+    "experience": [
+      {{
+        "title": "string",
+        "company": "string",
+        "location": "string",
+        "period": "string",
+        "responsibilities": [
+          "string (Achievement-oriented responsibility with integrated keywords.)"
+        ]
+      }}
+    ],
+    "education": [
+      {{
+        "degree": "string",
+        "institution": "string",
+        "period": "string",
+        "details": [ "string" ]
+      }}
+    ]
+  }},
+  "cover_letter": {{
+    "greeting": "### Dear Hiring Manager,",
+    "body": [
+      "string (Opening paragraph: State the position and express enthusiasm.)",
+      "string (Main body paragraph synthesising the skill gap analysis.)",
+      "string (Closing paragraph: Reiterate interest and include a strong call to action.)"
+    ],
+    "closing": "### Sincerely,",
+    "signature": "### Your Full Name"
+  }}
+}}
+```
+
+**IMPORTANT:** Respond with ONLY the JSON object. The entire response must be a single, valid JSON. Do not include `\```json` wrappers, explanations, or any other text.
+"""
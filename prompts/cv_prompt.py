@@ -1,4 +1,14 @@
 import json
+from utils.cv_relevance import compact_json
+from utils.json_parser import Schema
+
+CV_SPEC = {
+    'personal_info': {'full_name?': str, 'title?': str},
+    'summary?': str,
+    'experience': [{'title?': str, 'company?': str, 'responsibilities?': [str]}],
+    'education?': [{'degree?': str, 'institution?': str}]
+}
+CV_SCHEMA = Schema(CV_SPEC)
 
 def get_cv_prompt(job_details, cv_data):
     return f"""
@@ -8,7 +18,7 @@ You are an expert ATS-optimized resume writer and data structurer. Your task is
 {job_details['description']}
 
 **User's Full CV Information:**
-{cv_data}
+{compact_json(cv_data)}
 
 **Instructions & Logic:**
 
@@ -0,0 +1,14 @@
+def get_fix_json_prompt(broken_json, error, expected_shape):
+    return f"""
+The following text was supposed to be a single JSON object but could not be used: {error}
+
+**Broken JSON:**
+{broken_json}
+
+**Expected Shape:**
+{expected_shape}
+
+Fix the JSON so it is valid and matches the expected shape. Keep every value that is already there; do not rewrite, shorten or translate the content.
+
+**IMPORTANT:** Respond with ONLY the corrected JSON object. Do not include `\\```json` wrappers, explanations, or any other text.
+"""
@@ -0,0 +1,51 @@
+import threading
+
+
+class Cancelled(Exception):
+    """Raised inside a pipeline whose job was cancelled."""
+
+
+class CancelToken:
+    """Shared flag telling a running pipeline to stop.
+
+    Pipeline code calls ``check()`` before starting expensive work. Work that cannot
+    poll (a render subprocess) registers a callback that ``cancel()`` runs to abort it.
+    """
+
+    def __init__(self):
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason='Cancelled'):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def check(self):
+        """Raises Cancelled if the token was cancelled."""
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def register(self, callback):
+        """Runs ``callback`` on cancellation (immediately if already cancelled)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def unregister(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
@@ -0,0 +1,133 @@
+import json
+import math
+import re
+from collections import Counter
+
+# Fields that describe the candidate in general and rarely help tailor a single application
+DROPPED_PERSONAL_FIELDS = ('design_philosophy', 'references', 'behance_portfolio', 'willing_to_relocate')
+
+STOPWORDS = set('''
+a an and are as at be by for from has have in is it its of on or our that the their this to
+was we were will with you your they them who what when where which while into about across
+able all also any can do does more most must not other over per such than then these those
+using use used well within without work working experience team role job including etc
+'''.split())
+
+
+def tokenize(text):
+    """Lower-cased word tokens without stopwords; keeps tech spellings like c++, c#, node.js."""
+    words = re.findall(r'[a-z0-9][a-z0-9+#./\-]*', str(text).lower())
+    return [word.rstrip('.-/') for word in words if word.rstrip('.-/') not in STOPWORDS]
+
+
+class BM25:
+    """Okapi BM25 scores of short documents against a query."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.documents = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        self.k1 = k1
+        self.b = b
+        frequencies = Counter(term for document in self.documents for term in document)
+        count = len(self.documents)
+        self.idf = {term: math.log(1 + (count - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()}
+
+    def scores(self, query):
+        terms = set(tokenize(query))
+        results = []
+        for document, length in zip(self.documents, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            for term in terms & document.keys():
+                tf = document[term]
+                score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+def _top(items, query, limit, text=str):
+    """Keeps the ``limit`` best scoring items in their original order."""
+    if not items or limit is None or len(items) <= limit:
+        return list(items or [])
+    scores = BM25([text(item) for item in items]).scores(query)
+    ranked = sorted(range(len(items)), key=lambda index: (-scores[index], index))[:limit]
+    return [items[index] for index in sorted(ranked)]
+
+
+def _skill_name(skill):
+    return skill.get('name', '') if isinstance(skill, dict) else str(skill)
+
+
+def _select_skills(skills, job_description, limit):
+    """Keeps skills named in the job description, topped up with the most experienced ones."""
+    if not skills or limit is None:
+        return skills
+    if isinstance(skills, dict):
+        flat = [(category, skill) for category, entries in skills.items() for skill in (entries or [])]
+    else:
+        flat = [(None, skill) for skill in skills]
+    if len(flat) <= limit:
+        return skills
+
+    job_terms = set(tokenize(job_description))
+    lowered = job_description.lower()
+
+    def score(entry):
+        name = _skill_name(entry[1])
+        mentioned = name.lower() in lowered or bool(set(tokenize(name)) & job_terms)
+        years = entry[1].get('experience_years', 0) if isinstance(entry[1], dict) else 0
+        return (mentioned, years or 0)
+
+    keep = set(sorted(range(len(flat)), key=lambda index: score(flat[index]), reverse=True)[:limit])
+    if not isinstance(skills, dict):
+        return [skill for index, (_, skill) in enumerate(flat) if index in keep]
+    selected = {}
+    for index, (category, skill) in enumerate(flat):
+        if index in keep:
+            selected.setdefault(category, []).append(skill)
+    return selected
+
+
+def select_relevant_cv(cv_data, job_description, max_experiences=4, max_bullets=4, max_skills=15):
+    """Returns a copy of ``cv_data`` trimmed to what matters for this job description.
+
+    Experiences are ranked with BM25 against the job description and only the best
+    ``max_experiences`` are kept (in their original order); each keeps its best
+    ``max_bullets`` responsibilities and highlights. Skills named in the job description
+    are kept first, up to ``max_skills``. Education is always kept in full.
+    """
+    personal_info = {
+        key: value for key, value in (cv_data.get('personal_info') or {}).items()
+        if key not in DROPPED_PERSONAL_FIELDS
+    }
+    if 'skills' in personal_info:
+        personal_info['skills'] = _select_skills(personal_info['skills'], job_description, max_skills)
+    if isinstance(personal_info.get('professional_attributes'), list):
+        personal_info['professional_attributes'] = _top(
+            personal_info['professional_attributes'], job_description, max_bullets)
+
+    experiences = _top(
+        cv_data.get('experience') or [], job_description, max_experiences,
+        text=lambda exp: ' '.join(str(value) for value in exp.values() if value)
+    )
+    experiences = [dict(
+        exp,
+        responsibilities=_top(exp.get('responsibilities'), job_description, max_bullets),
+        highlights=_top(exp.get('highlights'), job_description, max_bullets)
+    ) for exp in experiences]
+
+    return dict(cv_data, personal_info=personal_info, experience=experiences)
+
+
+def _without_empty(value):
+    if isinstance(value, dict):
+        return {key: _without_empty(item) for key, item in value.items() if item not in (None, '', [], {})}
+    if isinstance(value, list):
+        return [_without_empty(item) for item in value if item not in (None, '', [], {})]
+    return value
+
+
+def compact_json(data):
+    """Serializes prompt context without indentation, whitespace or empty fields."""
+    return json.dumps(_without_empty(data), ensure_ascii=False, separators=(',', ':'))
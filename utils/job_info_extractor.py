@@ -0,0 +1,148 @@
+import re
+
+# Words that mark a line or phrase as a job title
+TITLE_KEYWORDS = [
+    'engineer', 'developer', 'designer', 'manager', 'analyst', 'specialist', 'consultant',
+    'coordinator', 'architect', 'scientist', 'administrator', 'technician', 'lead', 'director',
+    'officer', 'assistant', 'intern', 'programmer', 'strategist', 'producer', 'writer',
+    'editor', 'accountant', 'associate', 'representative', 'advisor', 'head of', 'owner'
+]
+
+# Lines under a title that give the location or the kind of job, not the company
+NOT_COMPANY_WORDS = {
+    'remote', 'hybrid', 'onsite', 'on-site', 'on site', 'in-office', 'in office', 'full-time', 'full time',
+    'part-time', 'part time', 'contract', 'contractor', 'temporary', 'temp', 'permanent', 'freelance',
+    'internship', 'seasonal', 'fixed-term', 'fixed term', 'work from home', 'wfh', 'anywhere', 'worldwide'
+}
+# Places often written bare under the title ("New York · Hybrid")
+PLACE_NAMES = {
+    'new york', 'nyc', 'san francisco', 'sf', 'bay area', 'los angeles', 'seattle', 'boston', 'chicago', 'austin',
+    'denver', 'atlanta', 'dallas', 'toronto', 'vancouver', 'montreal', 'ottawa', 'calgary', 'london', 'dublin',
+    'berlin', 'munich', 'paris', 'amsterdam', 'zurich', 'stockholm', 'singapore', 'hong kong', 'taipei', 'tokyo',
+    'shanghai', 'beijing', 'shenzhen', 'sydney', 'melbourne', 'bangalore', 'bengaluru', 'us', 'usa', 'united states',
+    'uk', 'united kingdom', 'canada', 'europe', 'emea', 'apac', 'ontario', 'california', 'texas'
+}
+# Teams and departments named under the title or in "X is hiring", not the employer
+TEAM_WORDS = {'team', 'teams', 'department', 'dept', 'division', 'squad'}
+DEPARTMENTS = {
+    'engineering', 'product', 'platform', 'sales', 'marketing', 'operations', 'finance', 'design', 'data',
+    'research', 'leadership', 'infrastructure', 'security', 'support', 'hr', 'human resources', 'people', 'legal', 'it'
+}
+# Heuristic company matches stay below the local threshold unless the name is repeated in the body
+HEURISTIC_SCORE = 0.65
+CITY_REGION = re.compile(r'^[A-Z][\w.\'\- ]+,\s*[A-Z][\w.\- ]*$')
+# Words that turn a line into a sentence rather than a title
+SENTENCE_WORDS = {'the', 'our', 'your', 'you', 'we', 'will', 'to', 'is', 'are', 'be', 'a', 'an', 'this', 'with'}
+
+TITLE_LABEL = re.compile(r'^\s*(?:job\s*title|position|role|title)\s*[:\-–]\s*(.+)$', re.IGNORECASE | re.MULTILINE)
+COMPANY_LABEL = re.compile(r'^\s*(?:company(?:\s*name)?|employer|organi[sz]ation)\s*[:\-–]\s*(.+)$', re.IGNORECASE | re.MULTILINE)
+ABOUT_COMPANY = re.compile(r'^\s*(?i:about\s+(?!the\s+(?:role|job|position|team)\b|us\b|you\b))([A-Z][\w&.,\'\- ]{1,60}?)\s*:?\s*$', re.MULTILINE)
+COMPANY_HIRING = re.compile(r'\b([A-Z][\w&.\'\-]*(?:[ \t]+[A-Z][\w&.\'\-]*){0,4})[ \t]+(?:is|are)[ \t]+(?:looking|hiring|seeking|searching)\b')
+TITLE_IN_PROSE = re.compile(
+    r'\b(?:looking for|hiring|seeking|searching for|join us as|join our team as)\s+(?:an?\s+|our\s+next\s+)?'
+    r'((?:[A-Z][\w/+#.\-]*\s+){0,5}[A-Z][\w/+#.\-]*)', re.MULTILINE)
+# LinkedIn puts "Company · Location" (Indeed "Company - Location") right under the title
+COMPANY_LOCATION_LINE = re.compile(r'^([^·•|\-–]{2,60}?)\s*[·•|\-–]\s+\S.*$')
+
+
+def _clean(value):
+    return value.strip().strip('*#').strip().rstrip('.,;:')
+
+
+def _is_noun_phrase(text):
+    words = text.lower().split()
+    return len(words) <= 6 and text[:1].isupper() and not SENTENCE_WORDS.intersection(words)
+
+
+def _is_location_or_job_type(line):
+    parts = [part.strip().lower() for part in re.split(r'\s[\-–]\s|[·•|,/()]', line) if part.strip()]
+    if parts and all(part in NOT_COMPANY_WORDS or part in PLACE_NAMES for part in parts):
+        return True
+    return bool(CITY_REGION.match(line)) and not COMPANY_LOCATION_LINE.match(line)
+
+
+def _is_plausible_company(name):
+    words = name.lower().split()
+    return (_is_noun_phrase(name) and not _is_location_or_job_type(name)
+            and not TEAM_WORDS.intersection(words) and name.lower() not in DEPARTMENTS)
+
+
+def _looks_like_title(text, known_titles):
+    lowered = text.lower()
+    if any(title.lower() == lowered for title in known_titles):
+        return 0.9
+    if any(title.lower() in lowered for title in known_titles):
+        return 0.8
+    # A keyword alone is not enough: "Lead the development of..." is a sentence, not a title
+    if _is_noun_phrase(text) and any(re.search(r'\b' + keyword + r'\b', lowered) for keyword in TITLE_KEYWORDS):
+        return 0.75
+    return 0.0
+
+
+def _find_title(lines, text, known_titles):
+    for match in TITLE_LABEL.finditer(text):
+        value = _clean(match.group(1))
+        if _is_noun_phrase(value) and not _is_location_or_job_type(value):
+            return value, 0.95
+
+    # Job boards show the title as the first line of the posting
+    for index, line in enumerate(lines[:3]):
+        score = _looks_like_title(_clean(line), known_titles)
+        if score:
+            return _clean(line), score if index == 0 else score - 0.1
+
+    match = TITLE_IN_PROSE.search(text)
+    if match and _looks_like_title(_clean(match.group(1)), known_titles):
+        return _clean(match.group(1)), 0.65
+    return None, 0.0
+
+
+def _find_company(lines, text, title):
+    for match in COMPANY_LABEL.finditer(text):
+        value = _clean(match.group(1))
+        if _is_plausible_company(value):
+            return value, 0.95
+
+    if title and title in lines[:3]:
+        following = lines[lines.index(title) + 1:lines.index(title) + 2]
+        for line in following:
+            if _is_location_or_job_type(line):
+                break
+            match = COMPANY_LOCATION_LINE.match(line)
+            if match and _is_plausible_company(_clean(match.group(1))):
+                return _clean(match.group(1)), HEURISTIC_SCORE
+            if not match and len(line.split()) <= 5 and not any(ch.isdigit() for ch in line) \
+                    and _is_plausible_company(line):
+                return _clean(line), 0.6
+
+    match = ABOUT_COMPANY.search(text)
+    if match and _is_plausible_company(_clean(match.group(1))):
+        return _clean(match.group(1)), 0.8
+
+    for match in COMPANY_HIRING.finditer(text):
+        if match.group(1).split()[0] not in ('We', 'Our', 'The', 'This', 'You') \
+                and _is_plausible_company(_clean(match.group(1))):
+            return _clean(match.group(1)), HEURISTIC_SCORE
+    return None, 0.0
+
+
+def extract_job_info_locally(job_description, known_titles=None):
+    """Guesses the job title and company name from common posting layouts.
+
+    Returns ``(job_title, company_name, confidence)`` where confidence (0-1) is the
+    lower of the two field scores; missing fields come back as None with confidence 0.
+    """
+    known_titles = [t for t in (known_titles or []) if isinstance(t, str) and t.strip()]
+    lines = [_clean(line) for line in job_description.splitlines() if _clean(line)]
+    if not lines:
+        return None, None, 0.0
+
+    title, title_score = _find_title(lines, job_description, known_titles)
+    company, company_score = _find_company(lines, job_description, title)
+    if title and company and title.lower() == company.lower():
+        company, company_score = None, 0.0
+    if company and company_score == HEURISTIC_SCORE and job_description.count(company) > 1:
+        # A name repeated in the body ("Shopify is looking for...") is rarely a coincidence;
+        # a bare line under the title gets no bonus, it may be a location or team name
+        company_score = round(min(0.95, company_score + 0.2), 2)
+    return title, company, min(title_score, company_score)
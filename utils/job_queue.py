@@ -0,0 +1,316 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from utils.cancellation import CancelToken
+
+
+class JobQueue:
+    """Runs application pipelines on a bounded pool and keeps their state in the database.
+
+    The state lives in the ``GenerationJob`` table, so any gunicorn worker can answer
+    a status poll, while only the worker that accepted the job executes it.
+
+    Submissions carrying a ``request_key`` are coalesced: while a job with the same key
+    is in flight (tracked in the ``InflightJob`` table), new submissions attach to it
+    instead of starting a second pipeline.
+
+    Batch jobs run on their own pool so a large batch cannot starve interactive submissions;
+    the runner is called with ``batch=True`` for them so it can keep their LLM calls apart too.
+
+    ``cancel`` marks a job as cancelled. A queued job is then skipped; a running job gets
+    its ``CancelToken`` cancelled, either directly when this worker runs it or at its
+    next stage update when another worker does.
+    """
+
+    FINISHED = ('success', 'error', 'cancelled')
+
+    def __init__(self, app, db, job_model, inflight_model, batch_model, runner, max_workers=2,
+                 batch_workers=2, retention_hours=24, inflight_timeout=900):
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.inflight_model = inflight_model
+        self.batch_model = batch_model
+        self.runner = runner
+        self.retention = timedelta(hours=retention_hours)
+        self.inflight_timeout = timedelta(seconds=inflight_timeout)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self.batch_executor = ThreadPoolExecutor(max_workers=batch_workers, thread_name_prefix='batch')
+        # Stage updates of one job may arrive from several LLM threads at once
+        self._lock = threading.Lock()
+        # Completion events and cancel tokens of the jobs owned by this worker
+        self._done = {}
+        self._tokens = {}
+
+    def submit(self, job_description, job_source, options=None, request_key=None, batch=False):
+        """Schedules a job on the pool, returning its id (or the id of the identical job in flight)."""
+        job_id, created = self._create(job_description, job_source, options, request_key)
+        if created:
+            executor = self.batch_executor if batch else self.executor
+            executor.submit(self._run, job_id, request_key, batch)
+        return job_id
+
+    def submit_batch(self, entries):
+        """Schedules every valid entry on the batch pool and returns the batch id.
+
+        Each entry holds ``job_description``, ``job_source``, ``options`` and ``request_key``,
+        or just an ``error`` for items rejected before queueing. Items fail independently.
+        """
+        items = []
+        for entry in entries:
+            if entry.get('error'):
+                items.append({'job_source': entry.get('job_source'), 'error': entry['error']})
+                continue
+            try:
+                job_id = self.submit(entry['job_description'], entry['job_source'], entry.get('options'),
+                                     entry.get('request_key'), batch=True)
+                items.append({'job_source': entry['job_source'], 'job_id': job_id})
+            except Exception as e:
+                logging.error(f"Error queueing batch item: {e}")
+                self.db.session.rollback()
+                items.append({'job_source': entry.get('job_source'), 'error': str(e)})
+
+        batch_id = uuid.uuid4().hex
+        self.db.session.add(self.batch_model(id=batch_id, items=items))
+        self.db.session.commit()
+        return batch_id
+
+    def get_batch(self, batch_id):
+        """Returns per-item status of a batch with counts per status, or None."""
+        batch = self.db.session.get(self.batch_model, batch_id)
+        if batch is None:
+            return None
+        items = []
+        counts = {'queued': 0, 'running': 0, 'success': 0, 'error': 0, 'cancelled': 0}
+        for index, item in enumerate(batch.items or []):
+            job = self.get(item['job_id']) if item.get('job_id') else None
+            if job is None:
+                status, files, error = 'error', None, item.get('error') or 'Job not found'
+            else:
+                status, error = job['status'], job['error']
+                files = (job['result'] or {}).get('files')
+            counts[status] = counts.get(status, 0) + 1
+            items.append({
+                'index': index,
+                'job_id': item.get('job_id'),
+                'job_source': item.get('job_source'),
+                'status': status,
+                'files': files,
+                'error': error
+            })
+        finished = counts['success'] + counts['error'] + counts['cancelled'] == len(items)
+        return {
+            'batch_id': batch.id,
+            'status': 'completed' if finished else 'running',
+            'counts': counts,
+            'items': items,
+            'created_at': batch.created_at.isoformat() if batch.created_at else None
+        }
+
+    def run(self, job_description, job_source, options=None, request_key=None, timeout=600):
+        """Runs a job in the calling thread, or waits for the identical job in flight.
+
+        Returns the pipeline result, or an ``(error, status_code)`` tuple.
+        """
+        job_id, created = self._create(job_description, job_source, options, request_key)
+        if created:
+            self._run(job_id, request_key)
+        else:
+            logging.info(f"Attached to in-flight job {job_id}")
+        return self.wait(job_id, timeout)
+
+    def wait(self, job_id, timeout=600):
+        """Blocks until the job finishes and returns its result like ``run``."""
+        deadline = time.monotonic() + timeout
+        event = self._done.get(job_id)
+        if event is not None:
+            event.wait(timeout)
+        while True:
+            self.db.session.expire_all()
+            job = self.db.session.get(self.job_model, job_id)
+            if job is None:
+                return {'status': 'error', 'message': 'Job not found'}, 404
+            if job.status == 'success':
+                return job.result
+            if job.status == 'error':
+                return {'status': 'error', 'message': job.error}, 500
+            if job.status == 'cancelled':
+                return {'status': 'cancelled', 'message': job.error or 'Cancelled'}, 499
+            if time.monotonic() > deadline:
+                return {'status': 'error', 'message': 'Timed out waiting for job'}, 504
+            # The job runs in another worker process, so poll the shared table
+            time.sleep(0.5)
+
+    def cancel(self, job_id, reason='Cancelled by the client'):
+        """Cancels a queued or running job.
+
+        Returns True if the job was cancelled, False if it had already finished, or None
+        if it does not exist.
+        """
+        with self._lock:
+            self.db.session.expire_all()
+            job = self.db.session.get(self.job_model, job_id)
+            if job is None:
+                return None
+            if job.status in self.FINISHED:
+                return False
+            job.status = 'cancelled'
+            job.error = reason
+            self.db.session.commit()
+        token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel(reason)
+        logging.info(f"Job {job_id} cancelled: {reason}")
+        return True
+
+    def get(self, job_id):
+        """Returns the job state as a dictionary, or None if it does not exist."""
+        job = self.db.session.get(self.job_model, job_id)
+        if job is None:
+            return None
+        return {
+            'job_id': job.id,
+            'status': job.status,
+            'stages': job.stages or {},
+            'result': job.result,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'updated_at': job.updated_at.isoformat() if job.updated_at else None
+        }
+
+    def _create(self, job_description, job_source, options, request_key):
+        """Creates a job row, or returns the in-flight job with the same key.
+
+        Returns ``(job_id, created)``.
+        """
+        if request_key is not None:
+            job_id = self._inflight_job(request_key)
+            if job_id is not None:
+                return job_id, False
+
+        job_id = uuid.uuid4().hex
+        self.db.session.add(self.job_model(
+            id=job_id,
+            status='queued',
+            job_description=job_description,
+            job_source=job_source,
+            options=options or {},
+            stages={}
+        ))
+        if request_key is not None:
+            self.db.session.add(self.inflight_model(request_key=request_key, job_id=job_id))
+        try:
+            self.db.session.commit()
+        except IntegrityError:
+            # Another worker claimed the key between the lookup and the insert
+            self.db.session.rollback()
+            existing = self._inflight_job(request_key)
+            if existing is not None:
+                return existing, False
+            return self._create(job_description, job_source, options, None)
+
+        self._done[job_id] = threading.Event()
+        self._tokens[job_id] = CancelToken()
+        self._prune()
+        return job_id, True
+
+    def _inflight_job(self, request_key):
+        """Returns the id of the live job holding ``request_key``, dropping stale claims."""
+        claim = self.db.session.get(self.inflight_model, request_key)
+        if claim is None:
+            return None
+        job = self.db.session.get(self.job_model, claim.job_id)
+        stale = claim.created_at < datetime.utcnow() - self.inflight_timeout
+        if job is None or job.status in self.FINISHED or stale:
+            self.db.session.delete(claim)
+            self.db.session.commit()
+            return None
+        return claim.job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock, self.app.app_context():
+            job = self.db.session.get(self.job_model, job_id)
+            if job is None:
+                return
+            if job.status == 'cancelled':
+                # Cancelled from another worker: stop the pipeline and keep the status
+                fields.pop('status', None)
+                fields.pop('result', None)
+                fields.pop('error', None)
+                token = self._tokens.get(job_id)
+                if token is not None:
+                    token.cancel(job.error or 'Cancelled')
+            stage = fields.pop('stage', None)
+            if stage is not None:
+                stages = dict(job.stages or {})
+                stages[stage[0]] = stage[1]
+                job.stages = stages
+            for key, value in fields.items():
+                setattr(job, key, value)
+            self.db.session.commit()
+
+    def _progress(self, job_id):
+        def progress(stage, status, **payload):
+            self._update(job_id, stage=(stage, dict(payload, status=status)))
+        return progress
+
+    def _run(self, job_id, request_key=None, batch=False):
+        token = self._tokens.setdefault(job_id, CancelToken())
+        try:
+            with self.app.app_context():
+                job = self.db.session.get(self.job_model, job_id)
+                if job.status == 'cancelled':
+                    logging.info(f"Skipping cancelled job {job_id}")
+                    return
+                job_description, job_source = job.job_description, job.job_source
+                options = job.options or {}
+            self._update(job_id, status='running')
+
+            with self.app.app_context():
+                result = self.runner(job_description, job_source, progress=self._progress(job_id),
+                                     cancel_token=token, batch=batch, **options)
+
+            if token.cancelled:
+                self._update(job_id, status='cancelled', error=token.reason)
+            elif isinstance(result, tuple):
+                self._update(job_id, status='error', error=result[0].get('message'))
+            else:
+                self._update(job_id, status='success', result=result)
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {e}", exc_info=True)
+            self._update(job_id, status='error', error=str(e))
+        finally:
+            if request_key is not None:
+                self._release(request_key, job_id)
+            self._tokens.pop(job_id, None)
+            event = self._done.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    def _release(self, request_key, job_id):
+        try:
+            with self.app.app_context():
+                self.inflight_model.query.filter_by(request_key=request_key, job_id=job_id).delete()
+                self.db.session.commit()
+        except Exception as e:
+            logging.error(f"Error releasing in-flight claim for job {job_id}: {e}")
+
+    def _prune(self):
+        """Deletes finished jobs older than the retention period."""
+        try:
+            cutoff = datetime.utcnow() - self.retention
+            self.job_model.query.filter(
+                self.job_model.status.in_(self.FINISHED),
+                self.job_model.updated_at < cutoff
+            ).delete(synchronize_session=False)
+            self.batch_model.query.filter(
+                self.batch_model.created_at < cutoff
+            ).delete(synchronize_session=False)
+            self.db.session.commit()
+        except Exception as e:
+            logging.error(f"Error pruning old jobs: {e}")
+            self.db.session.rollback()
@@ -0,0 +1,283 @@
+import json
+import re
+
+FENCE_OPEN = re.compile(r'```[a-zA-Z]*[ \t]*\n')
+CLOSERS = {'{': '}', '[': ']'}
+# Opening brackets tried before giving up on a response (prose may contain "[...]")
+MAX_CANDIDATES = 20
+
+
+class ModelJSONError(ValueError):
+    """Model output that could not be parsed (or repaired) into JSON matching its schema."""
+
+    def __init__(self, message, text=''):
+        super().__init__(message)
+        self.text = text
+
+
+class StreamingJSONParser:
+    """Finds the first top-level JSON object or array in model output fed chunk by chunk.
+
+    Anything before the opening bracket (prose, code fences) is skipped. ``complete``
+    turns true as soon as the brackets balance, so a streamed response can be parsed
+    without waiting for the trailing text; ``partial()`` repairs what arrived so far.
+    """
+
+    def __init__(self, start_chars='{['):
+        self.start_chars = start_chars
+        self.buffer = []
+        self.stack = []
+        self.started = False
+        self.complete = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk):
+        """Consumes a chunk and returns True once the top-level value is complete."""
+        for char in chunk:
+            if self.complete:
+                break
+            if not self.started:
+                if char not in self.start_chars:
+                    continue
+                self.started = True
+            self.buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in CLOSERS:
+                self.stack.append(CLOSERS[char])
+            elif char in '}]' and self.stack:
+                self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+        return self.complete
+
+    @property
+    def text(self):
+        return ''.join(self.buffer)
+
+    def result(self, schema=None):
+        """Parses the value seen so far, repairing it if needed (see ``parse_json_text``)."""
+        if not self.started:
+            raise ModelJSONError('No JSON object found in the response.')
+        return parse_json_text(self.text, schema)
+
+    def partial(self):
+        """Best-effort parse of an incomplete value, or None."""
+        try:
+            return json.loads(repair_json(self.text))
+        except ValueError:
+            return None
+
+
+def repair_json(text):
+    """Fixes the defects models commonly produce, without changing valid JSON.
+
+    Handles comments, Python literals, raw newlines inside strings, trailing
+    commas, and truncation (an unterminated string, a dangling key or comma, unclosed brackets).
+    """
+    out = []
+    stack = []
+    in_string = escaped = False
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == '\n':
+                char = '\\n'
+            elif char == '\t':
+                char = '\\t'
+            out.append(char)
+            index += 1
+            continue
+        if text.startswith('//', index):
+            index = text.find('\n', index) if '\n' in text[index:] else len(text)
+            continue
+        if text.startswith('/*', index):
+            end = text.find('*/', index + 2)
+            index = len(text) if end == -1 else end + 2
+            continue
+        literal = re.match(r'(True|False|None)\b', text[index:])
+        if literal and not (out and (out[-1].isalnum() or out[-1] == '_')):
+            out.append({'True': 'true', 'False': 'false', 'None': 'null'}[literal.group(1)])
+            index += len(literal.group(1))
+            continue
+        if char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in '}]':
+            _strip_trailing_comma(out)
+            if stack:
+                stack.pop()
+        out.append(char)
+        index += 1
+
+    # Truncated output: close the open string, drop a dangling key or separator, close brackets
+    if in_string:
+        if escaped:
+            out.pop()
+        out.append('"')
+    repaired = ''.join(out).rstrip()
+    while stack:
+        repaired = re.sub(r',\s*$', '', repaired)
+        if stack[-1] == '}':
+            # Only inside an object is a trailing string a key; in an array it is a complete element
+            repaired = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r'\1', repaired)
+        repaired = re.sub(r',\s*$', '', repaired).rstrip()
+        if repaired.endswith(':'):
+            repaired += ' null'
+        repaired += stack.pop()
+    return repaired
+
+
+def _strip_trailing_comma(out):
+    position = len(out) - 1
+    while position >= 0 and out[position].isspace():
+        position -= 1
+    if position >= 0 and out[position] == ',':
+        del out[position]
+
+
+def iter_json_texts(text, start_chars='{['):
+    """Yields the bracketed values in ``text`` in order, fenced ones first, skipping prose.
+
+    A value that fails to parse is not searched for nested starts; the next candidate
+    begins after it.
+    """
+    fence = FENCE_OPEN.search(text)
+    seen = set()
+    for source in ([text[fence.end():], text] if fence else [text]):
+        index = 0
+        while len(seen) < MAX_CANDIDATES:
+            starts = [position for position in (source.find(char, index) for char in start_chars) if position != -1]
+            if not starts:
+                break
+            parser = StreamingJSONParser(start_chars)
+            parser.feed(source[min(starts):])
+            index = min(starts) + len(parser.text)
+            # A truncated value may have swallowed the closing fence
+            candidate = parser.text if parser.complete else re.sub(r'\s*```\s*$', '', parser.text)
+            if candidate not in seen:
+                seen.add(candidate)
+                yield candidate
+
+
+def extract_json_text(text):
+    """Returns the first JSON object or array in ``text``, skipping fences and prose."""
+    for candidate in iter_json_texts(text):
+        return candidate
+    raise ModelJSONError('No JSON object found in the response.', text)
+
+
+def parse_json_text(json_text, schema=None):
+    try:
+        data = json.loads(json_text)
+    except ValueError:
+        try:
+            data = json.loads(repair_json(json_text))
+        except ValueError as e:
+            raise ModelJSONError(f'Invalid JSON received from the model: {e}', json_text)
+    if schema is not None:
+        errors = schema.validate(data)
+        if errors:
+            raise ModelJSONError(f"JSON does not match the expected shape: {'; '.join(errors[:5])}", json_text)
+    return data
+
+
+def parse_model_json(text, schema=None):
+    """Parses the JSON value in a model response, repairing common defects.
+
+    Every bracketed value in the response is tried in turn (only objects when ``schema``
+    describes an object), so a "[note]" in the surrounding prose does not hide the JSON.
+    Raises ModelJSONError with the problem of the longest candidate, the likeliest intended
+    value, if none parses and matches.
+    """
+    start_chars = '{['
+    if schema is not None and isinstance(schema.spec, (dict, list)):
+        start_chars = '{' if isinstance(schema.spec, dict) else '['
+    error = None
+    for candidate in iter_json_texts(text, start_chars):
+        try:
+            return parse_json_text(candidate, schema)
+        except ModelJSONError as e:
+            if error is None or len(candidate) > len(error.text):
+                error = e
+    raise error or ModelJSONError('No JSON object found in the response.', text)
+
+
+class Schema:
+    """A compiled shape check for model output.
+
+    The spec is built from plain Python values: a type (``str``, ``int``...), a list with
+    one item spec, or a dict of key specs where keys ending in ``?`` are optional
+    (and may be null). ``validate`` returns a list of problems, empty when the data fits.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._check = self._compile(spec, '$')
+
+    def _compile(self, spec, path):
+        if isinstance(spec, dict):
+            fields = []
+            for key, item_spec in spec.items():
+                optional = key.endswith('?')
+                name = key.rstrip('?')
+                fields.append((name, optional, self._compile(item_spec, f'{path}.{name}')))
+
+            def check_object(value, errors):
+                if not isinstance(value, dict):
+                    errors.append(f'{path} should be an object')
+                    return
+                for name, optional, check in fields:
+                    if value.get(name) is None:
+                        if not optional:
+                            errors.append(f'{path}.{name} is missing')
+                        continue
+                    check(value[name], errors)
+            return check_object
+
+        if isinstance(spec, list):
+            check_item = self._compile(spec[0], f'{path}[]')
+
+            def check_list(value, errors):
+                if not isinstance(value, list):
+                    errors.append(f'{path} should be a list')
+                    return
+                for item in value:
+                    check_item(item, errors)
+            return check_list
+
+        def check_type(value, errors):
+            if not isinstance(value, spec):
+                errors.append(f'{path} should be {spec.__name__}')
+        return check_type
+
+    def validate(self, data):
+        errors = []
+        self._check(data, errors)
+        return errors
+
+    def example(self):
+        """A JSON skeleton of the spec, for prompts asking the model to fix its output."""
+        def skeleton(spec):
+            if isinstance(spec, dict):
+                return {key.rstrip('?'): skeleton(item) for key, item in spec.items()}
+            if isinstance(spec, list):
+                return [skeleton(spec[0])]
+            return spec.__name__
+        return json.dumps(skeleton(self.spec), ensure_ascii=False)
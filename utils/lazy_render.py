@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import Future
+
+
+def write_atomic(path, data):
+    """Writes bytes to ``path`` through a temporary file, so readers never see a partial file."""
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class LazyRenders:
+    """PDFs whose HTML is stored when an application is generated and rendered on first download.
+
+    ``defer`` saves the documents and options next to the PDF path as ``<path>.pending.json``.
+    ``materialize`` renders the PDF from that file if it is not on disk yet; concurrent calls
+    for the same path in this process wait on one render. Other workers sharing the folder may
+    render the same file once more, which is harmless because files are replaced atomically.
+    """
+
+    SUFFIX = '.pending.json'
+
+    def __init__(self):
+        self.counters = {'deferred': 0, 'rendered': 0, 'shared': 0, 'errors': 0}
+        self._lock = threading.Lock()
+        self._renders = {}
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+
+    def defer(self, path, htmls, options):
+        """Stores what is needed to render ``path`` later."""
+        data = json.dumps({'htmls': htmls, 'options': options}, ensure_ascii=False)
+        write_atomic(path + self.SUFFIX, data.encode('utf-8'))
+        # An earlier file under the same name would otherwise be served instead of the new document
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self._count(deferred=1)
+
+    def pending(self, path):
+        return os.path.exists(path + self.SUFFIX)
+
+    def materialize(self, path, render):
+        """Makes sure the PDF at ``path`` exists, calling ``render(htmls, options)`` for its bytes.
+
+        Returns False when there is neither a PDF nor a pending render for ``path``.
+        """
+        with self._lock:
+            future = self._renders.get(path)
+            leader = future is None
+            if leader:
+                future = self._renders[path] = Future()
+        if not leader:
+            self._count(shared=1)
+            return future.result()
+        try:
+            result = self._render(path, render)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            self._count(errors=1)
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._renders[path]
+
+    def _render(self, path, render):
+        if os.path.exists(path):
+            return True
+        try:
+            with open(path + self.SUFFIX, encoding='utf-8') as f:
+                pending = json.load(f)
+        except FileNotFoundError:
+            # Another worker may have just finished it
+            return os.path.exists(path)
+        write_atomic(path, render(pending['htmls'], pending['options']))
+        try:
+            os.remove(path + self.SUFFIX)
+        except OSError:
+            pass
+        self._count(rendered=1)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._renders))
@@ -0,0 +1,173 @@
+import logging
+import threading
+from types import SimpleNamespace
+
+
+class LLMResponse:
+    """Minimal response object exposing ``text`` like the Gemini response."""
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage = usage
+
+
+class BackendError(Exception):
+    """Failed backend call carrying the HTTP ``status_code`` (None for connection errors)."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMBackend:
+    """A model endpoint the pipeline can send prompts to.
+
+    Subclasses create their client once and reuse it for every call; ``generate``
+    must be safe to call from several threads at once.
+    """
+
+    def __init__(self, name, model_name):
+        self.name = name
+        self.model_name = model_name
+
+    def generate(self, prompt, **kwargs):
+        """Returns a response object with ``text`` (and optionally usage data)."""
+        raise NotImplementedError
+
+
+class GeminiBackend(LLMBackend):
+    def __init__(self, name, api_key, model_name):
+        super().__init__(name, model_name)
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self._model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, **kwargs):
+        return self._model.generate_content(prompt, **kwargs)
+
+
+def _pooled_session(pool_size):
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI chat completions through the ``openai`` SDK, on a pooled HTTP session."""
+
+    def __init__(self, name, api_key, model_name, timeout=120, pool_size=8):
+        super().__init__(name, model_name)
+        import openai
+        self._openai = openai
+        self.api_key = api_key
+        self.timeout = timeout
+        # The 0.28 SDK opens a new session per request unless one is provided
+        openai.requestssession = _pooled_session(pool_size)
+
+    def generate(self, prompt, **kwargs):
+        completion = self._openai.ChatCompletion.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=kwargs.get('temperature', 0.7),
+            max_tokens=kwargs.get('max_tokens', 2048),
+            api_key=self.api_key,
+            request_timeout=self.timeout
+        )
+        return LLMResponse(completion.choices[0].message.content, usage=getattr(completion, 'usage', None))
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server speaking the OpenAI chat completions API (llama.cpp, vLLM, Ollama, ...).
+
+    ``base_url`` is the API root, e.g. ``http://localhost:8080/v1``.
+    """
+
+    def __init__(self, name, base_url, model_name, api_key=None, timeout=120, pool_size=8):
+        super().__init__(name, model_name)
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.timeout = timeout
+        self._session = _pooled_session(pool_size)
+        if api_key:
+            self._session.headers['Authorization'] = f'Bearer {api_key}'
+
+    def generate(self, prompt, **kwargs):
+        import requests
+        body = {
+            'model': self.model_name,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': kwargs.get('temperature', 0.7),
+            'max_tokens': kwargs.get('max_tokens', 2048)
+        }
+        try:
+            response = self._session.post(self.url, json=body, timeout=self.timeout)
+        except requests.RequestException as e:
+            # Treated like a 503 so the router falls back to another backend
+            raise BackendError(f'{self.name} unreachable: {e}', 503)
+        if response.status_code != 200:
+            raise BackendError(f'{self.name} returned {response.status_code}: {response.text[:200]}',
+                               response.status_code)
+        data = response.json()
+        usage = data.get('usage')
+        return LLMResponse(data['choices'][0]['message']['content'],
+                           usage=SimpleNamespace(**usage) if usage else None)
+
+
+class MockBackend(LLMBackend):
+    """Serves a backend slot with a ``utils.mock_llm.MockModel`` (offline testing)."""
+
+    def __init__(self, name, mock_model):
+        super().__init__(name, mock_model.model_name)
+        self._model = mock_model
+
+    def generate(self, prompt, **kwargs):
+        return self._model.generate_content(prompt, **kwargs)
+
+
+class LatencyAwareRouter:
+    """Orders backends for a call by recent median latency, penalised by recent error rate.
+
+    Backends with fewer than ``min_samples`` successful calls are scored with
+    ``default_latency``. With ``policy='ordered'`` the configured order is kept as is.
+    """
+
+    def __init__(self, names, latencies, outcomes, policy='latency', default_latency=10.0,
+                 error_penalty=4.0, min_samples=5):
+        self.names = list(names)
+        self.latencies = latencies
+        self.outcomes = outcomes
+        self.policy = policy
+        self.default_latency = default_latency
+        self.error_penalty = error_penalty
+        self.min_samples = min_samples
+        self._last_order = None
+        self._lock = threading.Lock()
+
+    def score(self, name):
+        latency = self.latencies[name].percentile(50, self.min_samples)
+        if latency is None:
+            latency = self.default_latency
+        return latency * (1 + self.error_penalty * self.outcomes[name].error_rate())
+
+    def order(self, preferred=None):
+        """Returns backend names best first; ``preferred`` (if configured) always goes first."""
+        names = list(self.names)
+        if self.policy == 'latency':
+            names.sort(key=lambda name: (self.score(name), self.names.index(name)))
+            with self._lock:
+                if names != self._last_order:
+                    logging.info(f"LLM routing order now {names}")
+                    self._last_order = names
+        if preferred in names:
+            names.remove(preferred)
+            names.insert(0, preferred)
+        return names
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'order': self.order(),
+            'scores': {name: round(self.score(name), 3) for name in self.names}
+        }
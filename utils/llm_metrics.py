@@ -0,0 +1,116 @@
+import threading
+from collections import deque
+
+from utils.provider_health import LatencyWindow
+
+
+def response_usage(response):
+    """Returns provider-reported ``(prompt_tokens, completion_tokens)``, or None if not reported."""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is not None and getattr(usage, 'prompt_token_count', None):
+        return usage.prompt_token_count, getattr(usage, 'candidates_token_count', 0) or 0
+    usage = getattr(response, 'usage', None)
+    if usage is not None and getattr(usage, 'prompt_tokens', None):
+        return usage.prompt_tokens, getattr(usage, 'completion_tokens', 0) or 0
+    return None
+
+
+def call_cost(prices, provider, prompt_tokens, completion_tokens):
+    """Cost in USD from per-million-token ``prices[provider] = {'input': ..., 'output': ...}``."""
+    price = prices.get(provider) or {}
+    return (prompt_tokens * price.get('input', 0.0) + completion_tokens * price.get('output', 0.0)) / 1_000_000
+
+
+def summarize_calls(calls):
+    """Totals and per-step breakdown of a list of call records (one application run)."""
+    summary = {'calls': 0, 'cache_hits': 0, 'errors': 0, 'fallbacks': 0, 'retries': 0,
+               'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0, 'steps': {}}
+    for call in calls:
+        step = summary['steps'].setdefault(call['step'], {
+            'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'latency_s': 0.0,
+            'cost_usd': 0.0, 'providers': []
+        })
+        for totals in (summary, step):
+            totals['calls'] += 1
+            totals['prompt_tokens'] += call['prompt_tokens']
+            totals['completion_tokens'] += call['completion_tokens']
+            totals['cost_usd'] += call['cost_usd']
+        step['latency_s'] = round(step['latency_s'] + call['latency_s'], 3)
+        step['providers'].append(call['provider'] or 'cache')
+        summary['cache_hits'] += call['cached']
+        summary['errors'] += bool(call['error'])
+        summary['fallbacks'] += call['fallback']
+        summary['retries'] += call['retries']
+    summary['cost_usd'] = round(summary['cost_usd'], 6)
+    for step in summary['steps'].values():
+        step['cost_usd'] = round(step['cost_usd'], 6)
+    return summary
+
+
+class LLMMetrics:
+    """Aggregates LLM call records per step and per provider/model for this worker.
+
+    A record is a dict with ``step``, ``provider``, ``model``, ``prompt_tokens``,
+    ``completion_tokens``, ``latency_s``, ``retries``, ``fallback``, ``cached``,
+    ``cost_usd`` and ``error``. The last ``history`` records are kept as they are.
+    """
+
+    def __init__(self, history=200):
+        self._recent = deque(maxlen=history)
+        self._steps = {}
+        self._providers = {}
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            self._recent.append(call)
+            provider_key = f"{call['provider']}:{call['model']}" if call['provider'] else 'cache'
+            for groups, key in ((self._steps, call['step']), (self._providers, provider_key)):
+                group = groups.get(key)
+                if group is None:
+                    group = groups[key] = {
+                        'calls': 0, 'errors': 0, 'cache_hits': 0, 'fallbacks': 0, 'retries': 0,
+                        'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0,
+                        'latency': LatencyWindow()
+                    }
+                group['calls'] += 1
+                group['errors'] += bool(call['error'])
+                group['cache_hits'] += call['cached']
+                group['fallbacks'] += call['fallback']
+                group['retries'] += call['retries']
+                group['prompt_tokens'] += call['prompt_tokens']
+                group['completion_tokens'] += call['completion_tokens']
+                group['cost_usd'] += call['cost_usd']
+                if not call['error'] and not call['cached']:
+                    group['latency'].add(call['latency_s'])
+
+    def step_averages(self, step):
+        """Mean completion tokens and latency of successful model calls of a step, or None."""
+        with self._lock:
+            group = self._steps.get(step)
+            if group is None:
+                return None
+            answered = group['calls'] - group['errors'] - group['cache_hits']
+            if answered <= 0:
+                return None
+            return {
+                'completion_tokens': group['completion_tokens'] / answered,
+                'latency_s': group['latency'].percentile(50, 1)
+            }
+
+    def stats(self):
+        def export(groups):
+            return {
+                key: dict(
+                    {name: value for name, value in group.items() if name != 'latency'},
+                    cost_usd=round(group['cost_usd'], 6),
+                    latency_s=group['latency'].stats()
+                ) for key, group in groups.items()
+            }
+
+        with self._lock:
+            return {
+                'steps': export(self._steps),
+                'providers': export(self._providers),
+                'recent': list(self._recent)[-20:]
+            }
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+
+class MockProviderError(Exception):
+    """Injected provider failure carrying an HTTP-like ``status_code``."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class MockUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class MockResponse:
+    """Looks like a Gemini response: ``text`` plus ``usage_metadata``."""
+
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = MockUsage(len(prompt) // 4 + 1, len(text) // 4 + 1)
+
+
+def _section(prompt, header):
+    """Returns the block following a ``**header**`` line, up to the next bold header."""
+    match = re.search(re.escape(header) + r'\s*\n(.*?)\n\s*\n\*\*', prompt, re.DOTALL)
+    return match.group(1).strip() if match else ''
+
+
+def _json_section(prompt, header):
+    try:
+        return json.loads(_section(prompt, header))
+    except ValueError:
+        return None
+
+
+def _job_info(prompt):
+    description = _section(prompt, '**Job Description:**') or prompt
+    lines = [line.strip(' -#*') for line in description.splitlines() if line.strip(' -#*')]
+    first = next((line for line in lines if 'job description' not in line.lower() and len(line) < 80), 'Mock Position')
+    return {'job_title': first[:60], 'company_name': 'Mock Company'}
+
+
+def _cv(prompt):
+    cv = _json_section(prompt, "**User's Full CV Information:**") or {}
+    personal = cv.get('personal_info') or {}
+    titles = personal.get('title')
+    return {
+        'personal_info': {
+            'full_name': personal.get('full_name', 'Mock Candidate'),
+            'title': titles[0] if isinstance(titles, list) and titles else (titles or 'Professional'),
+            'location': personal.get('location', ''),
+            'phone': personal.get('phone', ''),
+            'email': personal.get('email', ''),
+            'github': personal.get('github', '')
+        },
+        'summary': personal.get('summary') or 'Experienced professional with a record of delivering results.',
+        'experience': [{
+            'title': exp.get('title', ''),
+            'company': exp.get('company', ''),
+            'location': exp.get('location', ''),
+            'period': f"{exp.get('period_start', '')} - {exp.get('period_end') or 'Present'}",
+            'responsibilities': list(exp.get('responsibilities') or [])[:4] or ['Delivered projects on time.']
+        } for exp in cv.get('experience') or []],
+        'education': [{
+            'degree': edu.get('degree', ''),
+            'institution': edu.get('institution', ''),
+            'period': edu.get('period', ''),
+            'details': list(edu.get('highlights') or [])
+        } for edu in cv.get('education') or []]
+    }
+
+
+def _cover_letter(prompt):
+    cv = _json_section(prompt, "**User's Full CV Information (for context):**") or \
+        _json_section(prompt, "**User's Full CV Information:**") or {}
+    name = (cv.get('personal_info') or {}).get('full_name', 'Mock Candidate')
+    return {
+        'greeting': '### Dear Hiring Manager,',
+        'body': [
+            'I am excited to apply for this position and believe my experience is a strong match.',
+            'In my previous roles I delivered reliable, well-tested work and learned new tools quickly.',
+            'I would welcome the opportunity to discuss how I can contribute to your team.'
+        ],
+        'closing': '### Sincerely,',
+        'signature': f'### {name}'
+    }
+
+
+def _translate(text):
+    return '\n\n'.join(f'【譯】{paragraph.strip()}' for paragraph in re.split(r'\n\s*\n', text) if paragraph.strip())
+
+
+def mock_payload(prompt):
+    """Builds a response in the shape the given pipeline prompt asks for."""
+    if 'Fix the JSON so it is valid' in prompt:
+        from utils.json_parser import extract_json_text, repair_json
+        return repair_json(extract_json_text(_section(prompt, '**Broken JSON:**')))
+    if '"job_info"' in prompt and '"cover_letter"' in prompt:
+        return json.dumps({'job_info': _job_info(prompt), 'cv': _cv(prompt), 'cover_letter': _cover_letter(prompt)})
+    if 'English Paragraphs' in prompt:
+        paragraphs = _json_section(prompt, '**English Paragraphs (JSON array of Markdown strings):**') or []
+        return json.dumps({'translations': [_translate(paragraph) for paragraph in paragraphs]}, ensure_ascii=False)
+    if 'Translate the following English cover letter' in prompt:
+        return _translate(_section(prompt, '**English Cover Letter (Markdown):**'))
+    if 'extract the job title and the company name' in prompt:
+        description = prompt.split('---')[1] if prompt.count('---') >= 2 else prompt
+        return json.dumps(_job_info('**Job Description:**\n' + description.strip() + '\n\n**'))
+    if 'ATS-optimized resume writer' in prompt:
+        return json.dumps(_cv(prompt), ensure_ascii=False)
+    if 'cover letter writer' in prompt:
+        return json.dumps(_cover_letter(prompt), ensure_ascii=False)
+    return 'Mock response.'
+
+
+class MockModel:
+    """Offline stand-in for a provider client with ``generate_content(prompt)`` like Gemini.
+
+    Responses depend only on the prompt. Latency is ``latency`` seconds plus up to
+    ``jitter`` seconds, and calls fail with a 500 (``error_rate``) or a 429
+    (``rate_limit_rate``). Latency and failures are drawn from a generator seeded with
+    ``seed``, so a run with the same calls in the same order behaves the same way.
+    """
+
+    def __init__(self, name, latency=1.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=0):
+        self.model_name = f'mock-{name}'
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        seed_bytes = hashlib.sha256(f'{seed}:{name}'.encode('utf-8')).digest()
+        self._random = random.Random(int.from_bytes(seed_bytes[:8], 'big'))
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            delay = self.latency + self._random.random() * self.jitter
+            outcome = self._random.random()
+        time.sleep(delay)
+        if outcome < self.rate_limit_rate:
+            raise MockProviderError(f'429 Resource exhausted ({self.model_name})', 429)
+        if outcome < self.rate_limit_rate + self.error_rate:
+            raise MockProviderError(f'500 Internal error ({self.model_name})', 500)
+        return MockResponse(mock_payload(prompt), prompt)
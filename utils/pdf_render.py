@@ -0,0 +1,249 @@
+import io
+import logging
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import CancelledError, Future, TimeoutError as FutureTimeoutError
+from utils.cancellation import Cancelled
+
+
+class RenderError(Exception):
+    """A PDF render that failed, timed out or could not be queued."""
+
+
+def merge_pdfs(pdfs):
+    """Concatenates PDF documents given as bytes, in memory."""
+    from PyPDF2 import PdfMerger
+    merger = PdfMerger()
+    for pdf in pdfs:
+        merger.append(io.BytesIO(pdf))
+    output = io.BytesIO()
+    merger.write(output)
+    merger.close()
+    return output.getvalue()
+
+
+class WkhtmltopdfRenderer:
+    """Renders each document with a fresh wkhtmltopdf process (the ``pdfkit`` command line).
+
+    The process handle is kept so a render can be killed when it runs past ``timeout``
+    seconds or its ``cancel_token`` is cancelled. ``render_bundle`` passes several pages
+    to one process, which lays them out one after another in a single PDF.
+    """
+
+    name = 'wkhtmltopdf'
+
+    def __init__(self, configuration, timeout=60):
+        self.configuration = configuration
+        self.timeout = timeout
+        self.counters = {'renders': 0, 'errors': 0, 'timeouts': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+
+    def render(self, html, options, cancel_token=None):
+        """Returns the PDF bytes for ``html``."""
+        import pdfkit
+        renderer = pdfkit.PDFKit(html, 'string', options=options, configuration=self.configuration)
+        return self._run(renderer, html.encode('utf-8'), cancel_token)
+
+    def render_bundle(self, htmls, options, cancel_token=None):
+        """Returns one PDF with the documents in ``htmls`` in order, from a single process."""
+        import pdfkit
+        with tempfile.TemporaryDirectory(prefix='render-') as folder:
+            paths = []
+            for index, html in enumerate(htmls):
+                paths.append(os.path.join(folder, f'page_{index}.html'))
+                with open(paths[-1], 'w', encoding='utf-8') as f:
+                    f.write(html)
+            renderer = pdfkit.PDFKit(paths, 'file', options=options, configuration=self.configuration)
+            return self._run(renderer, None, cancel_token)
+
+    def _run(self, renderer, stdin, cancel_token):
+        started = time.perf_counter()
+        extra = {'creationflags': subprocess.CREATE_NO_WINDOW} if sys.platform == 'win32' else {}
+        process = subprocess.Popen(renderer.command(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, env=renderer.environ, **extra)
+        if cancel_token is not None:
+            cancel_token.register(process.kill)
+        try:
+            pdf, stderr = process.communicate(input=stdin, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            self._count(timeouts=1, errors=1)
+            raise RenderError(f'wkhtmltopdf did not finish within {self.timeout}s')
+        finally:
+            if cancel_token is not None:
+                cancel_token.unregister(process.kill)
+        if cancel_token is not None:
+            cancel_token.check()
+        try:
+            renderer.handle_error(process.returncode, stderr.decode('utf-8', errors='replace'))
+        except IOError as e:
+            self._count(errors=1)
+            raise RenderError(str(e))
+        self._count(renders=1, seconds=time.perf_counter() - started)
+        return pdf
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, engine=self.name, seconds=round(self.counters['seconds'], 3))
+
+    def close(self):
+        pass
+
+
+def chromium_pdf_options(options):
+    """Maps the wkhtmltopdf options used by this app onto Chromium's ``page.pdf()`` arguments."""
+    # Defaults are wkhtmltopdf's own, so documents rendered without options look the same
+    return {
+        'format': options.get('page-size', 'A4'),
+        'margin': {side: options.get(f'margin-{side}', '10mm') for side in ('top', 'right', 'bottom', 'left')},
+        'print_background': True
+    }
+
+
+class ChromiumPoolRenderer:
+    """Renders on a pool of warm headless Chromium pages (requires ``playwright``).
+
+    ``pool_size`` worker threads each own a browser, started up front so no render pays
+    the launch. Jobs wait in a queue of at most ``queue_depth``; a render that cannot be
+    queued, fails or takes longer than ``timeout`` seconds is handed to ``fallback``
+    (the wkhtmltopdf renderer), and the failing worker restarts its browser.
+    """
+
+    name = 'chromium'
+
+    def __init__(self, fallback=None, pool_size=2, queue_depth=16, timeout=60):
+        # Fail at start-up rather than on the first render when playwright is missing
+        from playwright.sync_api import sync_playwright  # noqa: F401
+        self.fallback = fallback
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.counters = {'renders': 0, 'errors': 0, 'timeouts': 0, 'rejected': 0, 'fallbacks': 0,
+                         'restarts': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_depth)
+        self._workers = [threading.Thread(target=self._work, name=f'chromium-{index}', daemon=True)
+                         for index in range(pool_size)]
+        for worker in self._workers:
+            worker.start()
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self.counters[name] += amount
+
+    def render(self, html, options, cancel_token=None):
+        """Returns the PDF bytes for ``html``."""
+        if cancel_token is not None:
+            cancel_token.check()
+        future = Future()
+        try:
+            self._queue.put_nowait((future, html, options))
+        except queue.Full:
+            self._count(rejected=1)
+            return self._fall_back(html, options, cancel_token, 'render queue is full')
+        if cancel_token is not None:
+            cancel_token.register(future.cancel)
+        try:
+            pdf = future.result(timeout=self.timeout)
+        except CancelledError:
+            raise Cancelled(cancel_token.reason if cancel_token is not None else 'Cancelled')
+        except FutureTimeoutError:
+            future.cancel()
+            self._count(timeouts=1)
+            return self._fall_back(html, options, cancel_token, f'no PDF within {self.timeout}s')
+        except RenderError as e:
+            return self._fall_back(html, options, cancel_token, str(e))
+        finally:
+            if cancel_token is not None:
+                cancel_token.unregister(future.cancel)
+        if cancel_token is not None:
+            cancel_token.check()
+        return pdf
+
+    def render_bundle(self, htmls, options, cancel_token=None):
+        """Renders each document on the pool and concatenates them (Chromium has no multi-page input)."""
+        return merge_pdfs([self.render(html, options, cancel_token) for html in htmls])
+
+    def _fall_back(self, html, options, cancel_token, reason):
+        if self.fallback is None:
+            raise RenderError(f'Chromium render failed: {reason}')
+        logging.warning(f"Chromium render failed ({reason}), using {self.fallback.name}")
+        self._count(fallbacks=1)
+        return self.fallback.render(html, options, cancel_token)
+
+    def _work(self):
+        from playwright.sync_api import sync_playwright
+        # Playwright's sync API must be used from the thread that started it
+        playwright = browser = page = None
+        while True:
+            if page is None:
+                try:
+                    playwright = playwright or sync_playwright().start()
+                    browser = playwright.chromium.launch()
+                    page = browser.new_page()
+                except Exception as e:
+                    logging.error(f"Could not start Chromium: {e}")
+                    browser = page = None
+            item = self._queue.get()
+            if item is None:
+                break
+            future, html, options = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if page is None:
+                future.set_exception(RenderError('Chromium is not running'))
+                continue
+            started = time.perf_counter()
+            try:
+                page.set_content(html, wait_until='load', timeout=self.timeout * 1000)
+                pdf = page.pdf(**chromium_pdf_options(options))
+            except Exception as e:
+                self._count(errors=1, restarts=1)
+                future.set_exception(RenderError(str(e)))
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+                browser = page = None
+                continue
+            self._count(renders=1, seconds=time.perf_counter() - started)
+            future.set_result(pdf)
+        if browser is not None:
+            browser.close()
+        if playwright is not None:
+            playwright.stop()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters, seconds=round(self.counters['seconds'], 3))
+        return dict(counters, engine=self.name, pool_size=self.pool_size, queued=self._queue.qsize(),
+                    fallback=self.fallback.stats() if self.fallback is not None else None)
+
+    def close(self):
+        for _ in self._workers:
+            self._queue.put(None)
+
+
+def build_renderer(engine, configuration, pool_size=2, queue_depth=16, timeout=60):
+    """Returns the renderer for ``engine`` ('wkhtmltopdf' or 'chromium').
+
+    Falls back to wkhtmltopdf when Chromium is asked for but playwright is not installed.
+    """
+    wkhtmltopdf = WkhtmltopdfRenderer(configuration, timeout)
+    if engine == 'chromium':
+        try:
+            return ChromiumPoolRenderer(wkhtmltopdf, pool_size, queue_depth, timeout)
+        except ImportError:
+            logging.warning("PDF_RENDER_ENGINE=chromium needs playwright; using wkhtmltopdf")
+    return wkhtmltopdf
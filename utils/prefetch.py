@@ -0,0 +1,62 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class PrefetchCache:
+    """Speculative work started before a job is submitted, keyed by job description hash.
+
+    ``start(key, **tasks)`` runs each task on ``executor`` once per key and ``get(key)``
+    returns the futures by task name. Entries live in this process only; they expire
+    after ``ttl_seconds`` and at most ``max_items`` are kept, least recently used first.
+    """
+
+    def __init__(self, executor, max_items=32, ttl_seconds=900):
+        self.executor = executor
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'started': 0, 'duplicates': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] >= self.ttl_seconds:
+            del self._entries[key]
+            entry = None
+        return entry
+
+    def start(self, key, **tasks):
+        """Submits ``tasks`` (name -> callable) unless they already run for ``key``.
+
+        Returns True if new work was started.
+        """
+        with self._lock:
+            if self._live(key, time.time()) is not None:
+                self._entries.move_to_end(key)
+                self.counters['duplicates'] += 1
+                return False
+            futures = {name: self.executor.submit(task) for name, task in tasks.items()}
+            self._entries[key] = (futures, time.time())
+            self.counters['started'] += 1
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+        logging.info(f"Prefetch started for {key[:12]}")
+        return True
+
+    def get(self, key):
+        """Returns the futures started for ``key`` by task name, or None."""
+        with self._lock:
+            entry = self._live(key, time.time())
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[0]
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
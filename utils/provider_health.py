@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """Stops routing calls to a provider after repeated failures.
+
+    The circuit opens after ``failure_threshold`` consecutive failures. While open,
+    ``allow`` lets one probe call through every ``recovery_timeout`` seconds; a
+    successful probe closes the circuit again.
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.counters = {'successes': 0, 'failures': 0, 'rejected': 0, 'probes': 0}
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Checks whether a call may be sent to the provider now."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if time.monotonic() - self.opened_at >= self.recovery_timeout:
+                # Let one probe through and wait another period before the next one
+                self.state = 'half-open'
+                self.opened_at = time.monotonic()
+                self.counters['probes'] += 1
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.counters['successes'] += 1
+            self.failures = 0
+            if self.state != 'closed':
+                logging.info(f"Circuit for {self.name} closed")
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self.counters['failures'] += 1
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                if self.state == 'closed':
+                    logging.warning(f"Circuit for {self.name} opened after {self.failures} failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, state=self.state, consecutive_failures=self.failures)
+
+
+class LatencyWindow:
+    """Keeps the latencies of the last ``size`` successful calls."""
+
+    def __init__(self, size=100):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent, min_samples=5):
+        """Returns the given latency percentile, or None until ``min_samples`` calls were seen."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percent / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+    def stats(self):
+        with self._lock:
+            count = len(self._samples)
+        return {
+            'samples': count,
+            'p50': self.percentile(50, 1),
+            'p90': self.percentile(90, 1),
+            'p99': self.percentile(99, 1)
+        }
+
+
+class OutcomeWindow:
+    """Keeps the outcome (success or failure) of the last ``size`` calls.
+
+    Outcomes older than ``max_age`` seconds are ignored, so a provider that stopped
+    receiving traffic after a bad spell is not penalised forever.
+    """
+
+    def __init__(self, size=50, max_age=300.0):
+        self._outcomes = deque(maxlen=size)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def add(self, success):
+        with self._lock:
+            self._outcomes.append((time.monotonic(), bool(success)))
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            return [success for recorded_at, success in self._outcomes if recorded_at >= cutoff]
+
+    def error_rate(self):
+        outcomes = self._recent()
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def stats(self):
+        return {'samples': len(self._recent()), 'error_rate': round(self.error_rate(), 3)}
@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+
+def is_rate_limit_error(error):
+    """Checks whether a provider error means we are being throttled."""
+    if getattr(error, 'status_code', None) == 429 or getattr(error, 'http_status', None) == 429:
+        return True
+    message = str(error)
+    return '429' in message or 'RESOURCE_EXHAUSTED' in message or 'Rate limit' in message
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units per minute, holding at most one minute worth of units."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until ``amount`` units are available (0 if they are available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / self.rate
+
+    def take(self, amount):
+        self.available -= min(amount, self.capacity)
+
+    def drain(self):
+        self.available = min(self.available, 0.0)
+
+
+class ProviderLimiter:
+    """Requests-per-minute, tokens-per-minute and adaptive concurrency for one provider/model.
+
+    Concurrency follows AIMD: the limit is halved on every 429 and grows back by about
+    one slot per window of fast successful calls, up to ``max_concurrency``.
+    """
+
+    def __init__(self, name, rpm=0, tpm=0, max_concurrency=8, latency_target=30.0):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.counters = {'calls': 0, 'throttled': 0, 'queued': 0, 'wait_seconds': 0.0}
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+
+    def _reserve(self, tokens):
+        """Takes one request and ``tokens`` tokens, or returns how long to wait for them."""
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        if wait == 0.0:
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+        return wait
+
+    @contextmanager
+    def acquire(self, estimated_tokens=0, timeout=300):
+        """Blocks until the call fits the limits, then records its outcome.
+
+        Raises TimeoutError if the call could not start within ``timeout`` seconds.
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+        queued = False
+        with self._lock:
+            while True:
+                if self.in_flight < max(1, int(self.limit)):
+                    wait = self._reserve(estimated_tokens)
+                    if wait == 0.0:
+                        break
+                else:
+                    wait = None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for {self.name} rate limit")
+                if not queued:
+                    queued = True
+                    self.counters['queued'] += 1
+                self._slot_free.wait(remaining if wait is None else min(wait, remaining))
+            self.in_flight += 1
+            self.counters['calls'] += 1
+            self.counters['wait_seconds'] += time.monotonic() - started
+
+        call_started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self._throttled()
+            raise
+        else:
+            self._succeeded(time.monotonic() - call_started)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self._slot_free.notify_all()
+
+    def _throttled(self):
+        with self._lock:
+            self.counters['throttled'] += 1
+            self.limit = max(1.0, self.limit / 2)
+            # The provider disagrees with our buckets, so stop sending until they refill
+            if self.requests:
+                self.requests.drain()
+            if self.tokens:
+                self.tokens.drain()
+        logging.warning(f"{self.name} throttled, concurrency limit now {int(self.limit)}")
+
+    def _succeeded(self, latency):
+        with self._lock:
+            if latency > self.latency_target * 2:
+                self.limit = max(1.0, self.limit * 0.9)
+            elif latency < self.latency_target:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / max(self.limit, 1.0))
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self.counters,
+                wait_seconds=round(self.counters['wait_seconds'], 3),
+                in_flight=self.in_flight,
+                concurrency_limit=int(self.limit),
+                max_concurrency=self.max_concurrency
+            )
+
+
+class RateLimiterRegistry:
+    """Lazily creates one ProviderLimiter per (provider, model).
+
+    ``config(provider)`` returns the keyword arguments for a new limiter.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider, model_name):
+        key = f'{provider}:{model_name}'
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = ProviderLimiter(key, **self.config(provider))
+                self._limiters[key] = limiter
+            return limiter
+
+    def stats(self):
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {key: limiter.stats() for key, limiter in limiters.items()}
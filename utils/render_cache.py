@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+
+class RenderCache:
+    """Rendered PDFs on disk, keyed by a hash of the HTML and the render options.
+
+    Files live in ``folder`` as ``<key>.pdf``; a hit refreshes the file's modification
+    time, and once the folder grows past ``max_bytes`` the least recently used files
+    are deleted. Several workers can share the folder: writes are atomic renames, and
+    since other workers' writes are invisible to this process's size estimate, the folder
+    is rescanned at least every ``rescan_seconds`` while writing.
+    """
+
+    def __init__(self, folder, max_bytes=200 * 1024 * 1024, rescan_seconds=30):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.rescan_seconds = rescan_seconds
+        os.makedirs(folder, exist_ok=True)
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bytes_saved': 0}
+        self._lock = threading.Lock()
+        self._size = 0
+        self._scanned_at = 0.0
+        self.trim()
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.folder) if entry.name.endswith('.pdf')]
+
+    def _path(self, key):
+        return os.path.join(self.folder, f'{key}.pdf')
+
+    @staticmethod
+    def key(engine, htmls, options):
+        """Hashes the renderer engine, the HTML document(s) and the options."""
+        raw = json.dumps([engine, htmls, options], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Returns the stored PDF bytes for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.counters['misses'] += 1
+            return None
+        with self._lock:
+            self.counters['hits'] += 1
+            self.counters['bytes_saved'] += len(pdf)
+        return pdf
+
+    def set(self, key, pdf):
+        path = self._path(key)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(pdf)
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(temp_path, path)
+        except OSError as e:
+            logging.error(f"Could not store rendered PDF {key[:12]}: {e}")
+            return
+        with self._lock:
+            self.counters['stores'] += 1
+            self._size += len(pdf) - replaced
+            due = self._size > self.max_bytes or time.monotonic() - self._scanned_at > self.rescan_seconds
+        if due:
+            self.trim()
+
+    def trim(self):
+        """Rescans the folder and deletes least recently used files until it fits in ``max_bytes``."""
+        with self._lock:
+            self._scanned_at = time.monotonic()
+            entries = []
+            for entry in self._entries():
+                try:
+                    entries.append((entry.stat().st_mtime, entry.stat().st_size, entry.path))
+                except OSError:
+                    continue  # Removed by another worker
+            size = sum(entry[1] for entry in entries)
+            for _, file_size, path in sorted(entries):
+                if size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    self.counters['evictions'] += 1
+                except OSError:
+                    pass
+                size -= file_size
+            self._size = size
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            size = self._size
+        lookups = counters['hits'] + counters['misses']
+        return dict(counters, hit_rate=round(counters['hits'] / lookups, 3) if lookups else None,
+                    size_bytes=size, max_bytes=self.max_bytes)
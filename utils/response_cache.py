@@ -0,0 +1,156 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TieredCache:
+    """Two-tier cache: an in-process LRU in front of a SQLite table shared by all workers.
+
+    Values must be JSON serializable. Entries expire after ``ttl_seconds`` and the
+    SQLite tier is trimmed to ``max_items`` entries, least recently used first.
+    """
+
+    def __init__(self, db_path, namespace='default', max_memory_items=256, max_items=5000,
+                 ttl_seconds=7 * 24 * 3600):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.max_memory_items = max_memory_items
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes_since_trim = 0
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0}
+        self._connection().execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def get(self, key):
+        """Returns the cached value for ``key``, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT value, created_at, accessed_at FROM cache WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            ).fetchone()
+            if row is None or now - row[1] >= self.ttl_seconds:
+                self._count('misses')
+                return None
+            # Only touch the access time occasionally to keep reads cheap
+            if now - row[2] > 60:
+                conn.execute(
+                    'UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                    (now, self.namespace, key)
+                )
+            value = json.loads(row[0])
+        except sqlite3.Error as e:
+            logging.error(f"Cache read failed: {e}")
+            self._count('misses')
+            return None
+
+        self._remember(key, value, row[1])
+        self._count('disk_hits')
+        return value
+
+    def set(self, key, value):
+        """Stores ``value`` under ``key`` in both tiers."""
+        now = time.time()
+        self._remember(key, value, now)
+        self._count('sets')
+        try:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, created_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (self.namespace, key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            with self._lock:
+                self._writes_since_trim += 1
+                trim = self._writes_since_trim >= 50
+                if trim:
+                    self._writes_since_trim = 0
+            if trim:
+                self.trim()
+        except sqlite3.Error as e:
+            logging.error(f"Cache write failed: {e}")
+
+    def delete(self, key):
+        """Removes ``key`` from both tiers."""
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            self._connection().execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+        except sqlite3.Error as e:
+            logging.error(f"Cache delete failed: {e}")
+
+    def _remember(self, key, value, created_at):
+        with self._lock:
+            self._memory[key] = (value, created_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
+
+    def trim(self):
+        """Removes expired entries and the least recently used ones above ``max_items``."""
+        conn = self._connection()
+        cutoff = time.time() - self.ttl_seconds
+        expired = conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND created_at < ?', (self.namespace, cutoff)
+        ).rowcount
+        overflow = conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND key IN ('
+            'SELECT key FROM cache WHERE namespace = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.namespace, self.namespace, self.max_items)
+        ).rowcount
+        self._count('evictions', expired + overflow)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        self._connection().execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+
+    def stats(self):
+        """Returns hit/miss counters of this process plus the size of the shared tier."""
+        with self._lock:
+            stats = dict(self.counters, memory_items=len(self._memory))
+        try:
+            stats['disk_items'] = self._connection().execute(
+                'SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            stats['disk_items'] = None
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
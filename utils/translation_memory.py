@@ -0,0 +1,82 @@
+import hashlib
+import logging
+import re
+import threading
+
+PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+
+
+def split_paragraphs(markdown):
+    """Splits Markdown on blank lines, dropping empty paragraphs."""
+    return [paragraph.strip() for paragraph in PARAGRAPH_BREAK.split(markdown) if paragraph.strip()]
+
+
+def normalize_paragraph(paragraph):
+    """Collapses whitespace so re-wrapped but otherwise identical paragraphs share an entry."""
+    return ' '.join(paragraph.split())
+
+
+class TranslationMemory:
+    """Remembers translations paragraph by paragraph in a ``TieredCache``.
+
+    ``translate_paragraphs(paragraphs)`` is only called with the paragraphs that have
+    no stored translation and must return their translations in the same order.
+    """
+
+    def __init__(self, cache, language):
+        self.cache = cache
+        self.language = language
+        self.counters = {'paragraphs': 0, 'reused': 0, 'translated': 0}
+        self._lock = threading.Lock()
+
+    def _key(self, paragraph):
+        raw = f'{self.language}\n{normalize_paragraph(paragraph)}'
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def translate(self, markdown, translate_paragraphs, use_memory=True):
+        """Translates ``markdown`` and stitches the paragraphs back together in order.
+
+        With ``use_memory=False`` every paragraph is translated again, and the new
+        translations replace the stored ones.
+        """
+        paragraphs = split_paragraphs(markdown)
+        translations = {}
+        for paragraph in paragraphs:
+            key = self._key(paragraph)
+            if key in translations:
+                continue
+            # Lines without letters (separators, bare links, numbers) need no translation
+            if not re.search(r'[A-Za-z]', paragraph):
+                translations[key] = paragraph
+            elif use_memory:
+                translations[key] = self.cache.get(key)
+            else:
+                translations[key] = None
+
+        missing = [paragraph for paragraph in paragraphs if translations[self._key(paragraph)] is None]
+        missing = list(dict.fromkeys(missing))
+        if missing:
+            translated = translate_paragraphs(missing)
+            if len(translated) != len(missing):
+                raise ValueError(f"Expected {len(missing)} translated paragraphs, got {len(translated)}")
+            for paragraph, translation in zip(missing, translated):
+                translations[self._key(paragraph)] = translation.strip()
+                self.cache.set(self._key(paragraph), translation.strip())
+
+        with self._lock:
+            self.counters['paragraphs'] += len(paragraphs)
+            self.counters['translated'] += len(missing)
+            self.counters['reused'] += len(paragraphs) - len(missing)
+        logging.info(f"Translation memory: {len(paragraphs) - len(missing)}/{len(paragraphs)} paragraphs reused")
+        return '\n\n'.join(translations[self._key(paragraph)] for paragraph in paragraphs)
+
+    def reuse_rate(self):
+        """Share of the paragraphs seen so far that were taken from the memory."""
+        with self._lock:
+            paragraphs, reused = self.counters['paragraphs'], self.counters['reused']
+        return reused / paragraphs if paragraphs else 0.0
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        return dict(counters, cache=self.cache.stats())